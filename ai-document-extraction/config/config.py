@@ -1,18 +1,30 @@
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# API Keys
-MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+from functools import lru_cache
+from dotenv import dotenv_values
 
 # Paths
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INPUT_DIR = os.path.join(PROJECT_ROOT, "data", "input")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "output")
 
+@lru_cache(maxsize=None)
+def _dotenv():
+    """Parse the .env file once per process (Vercel doesn't ship one)"""
+    if os.environ.get("VERCEL"):
+        return {}
+    return dotenv_values(os.path.join(PROJECT_ROOT, ".env"))
+
+def _getenv(name, default=None):
+    """Look up a setting, preferring the real environment over the .env file"""
+    value = os.environ.get(name)
+    if value is None:
+        value = _dotenv().get(name)
+    return default if value is None else value
+
+# API Keys
+MISTRAL_API_KEY = _getenv("MISTRAL_API_KEY")
+ANTHROPIC_API_KEY = _getenv("ANTHROPIC_API_KEY")
+
 # Document types and their required fields
 DOCUMENT_TYPES = {
     "invoice": {
@@ -44,24 +56,36 @@ AVAILABLE_MODELS = ["mistral", "pixtral"]
 # Default AI model (if not specified)
 DEFAULT_AI_MODEL = "pixtral"  # Change to pixtral to use multimodal capabilities
 
+# Version of the extraction prompts; bump it when they change so cached results are not reused
+EXTRACTION_PROMPT_VERSION = "v2"
+
+# Cache for AI extraction results, keyed by model, prompt version, document type and text
+LLM_CACHE_DIR = _getenv("LLM_CACHE_DIR", os.path.join(PROJECT_ROOT, "data", "llm_cache"))
+LLM_CACHE_TTL = int(_getenv("LLM_CACHE_TTL", 7 * 24 * 60 * 60))  # 7 days
+LLM_CACHE_DISABLED = _getenv("LLM_CACHE_DISABLED", "0") == "1"
+
 # Output formats
 OUTPUT_FORMATS = ["json", "csv", "txt"]
 
+# Precomputed lookups for request validation
+DOCUMENT_TYPES_KEYS = tuple(DOCUMENT_TYPES)
+OUTPUT_FORMATS_SET = frozenset(OUTPUT_FORMATS)
+
 # API Settings
-API_HOST = os.getenv("API_HOST", "0.0.0.0")
-API_PORT = int(os.getenv("API_PORT", 9003))
+API_HOST = _getenv("API_HOST", "0.0.0.0")
+API_PORT = int(_getenv("API_PORT", 9003))
 
 # QuickBooks Settings
-QUICKBOOKS_API_KEY = os.getenv("QUICKBOOKS_API_KEY")
-QUICKBOOKS_CLIENT_ID = os.getenv("QUICKBOOKS_CLIENT_ID")
-QUICKBOOKS_CLIENT_SECRET = os.getenv("QUICKBOOKS_CLIENT_SECRET")
-QUICKBOOKS_COMPANY_ID = os.getenv("QUICKBOOKS_COMPANY_ID")
-QUICKBOOKS_REDIRECT_URI = os.getenv("QUICKBOOKS_REDIRECT_URI")
+QUICKBOOKS_API_KEY = _getenv("QUICKBOOKS_API_KEY")
+QUICKBOOKS_CLIENT_ID = _getenv("QUICKBOOKS_CLIENT_ID")
+QUICKBOOKS_CLIENT_SECRET = _getenv("QUICKBOOKS_CLIENT_SECRET")
+QUICKBOOKS_COMPANY_ID = _getenv("QUICKBOOKS_COMPANY_ID")
+QUICKBOOKS_REDIRECT_URI = _getenv("QUICKBOOKS_REDIRECT_URI")
 
 # Database Settings
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ai_document_extraction.db")  # Default to SQLite for development
+DATABASE_URL = _getenv("DATABASE_URL", "sqlite:///./ai_document_extraction.db")  # Default to SQLite for development
 
 # Vercel Settings
-IS_VERCEL = os.getenv("VERCEL", False)
-VERCEL_ENV = os.getenv("VERCEL_ENV", "development")
-S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")  # For file storage in production 
\ No newline at end of file
+IS_VERCEL = _getenv("VERCEL", False)
+VERCEL_ENV = _getenv("VERCEL_ENV", "development")
+S3_BUCKET_NAME = _getenv("S3_BUCKET_NAME")  # For file storage in production 
\ No newline at end of file
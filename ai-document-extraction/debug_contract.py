@@ -4,15 +4,23 @@ import os
 import sys
 import json
 import logging
+import logging.handlers
 import re
 from traceback import format_exc
 
 # Configure detailed logging
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Buffer records for the debug log file so they are written in batches; the buffer
+# is flushed when full, on ERROR, and by logging's shutdown hook at exit
+_log_file = logging.FileHandler("contract_debug.log")
+_log_file.setFormatter(logging.Formatter(LOG_FORMAT))
+
 logging.basicConfig(
     level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler("contract_debug.log"),
+        logging.handlers.MemoryHandler(1024, flushLevel=logging.ERROR, target=_log_file),
         logging.StreamHandler(sys.stdout)
     ]
 )
@@ -24,6 +32,22 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from utils.contract_extractor import EnhancedContractExtractor
 from utils.ai_extractor import AIExtractor
 
+# These are the regexes that are likely causing the issue, compiled once at import
+_DEBUG_PATTERNS = {
+    "contract_number": [
+        re.compile(r"(?i)CONTRACT\s+NUMBER:?\s*([A-Z0-9]+-[A-Z0-9]+-[A-Z0-9]+)"),
+        re.compile(r"(?i)CONTRACT\s+(?:NO|NUMBER|#):?\s*([A-Z0-9\-]+)")
+    ],
+    # The name runs are matched atomically, (?=(?P<name>...))(?P=name), so the regex engine
+    # never backtracks into them to retry the optional suffix that follows
+    "client_name": [
+        re.compile(r"(?i)Between:\s*(?=(?P<name>[A-Za-z0-9\s]+))(?P=name)(?:\s*\(.*?Client.*?\))?"),
+        re.compile(r"(?i)CLIENT:?\s*(?=(?P<name>[A-Za-z0-9\s,\.]+))(?P=name)"),
+        re.compile(r"(?i)(?:CLIENT|CUSTOMER):?\s*((?=(?P<name>[A-Za-z0-9\s]+))(?P=name)(?:Ltd\.?|LLC|Inc\.?|Corporation|Corp\.?|GmbH)?)")
+    ],
+    # ...and more fields
+}
+
 def debug_regex_extraction(text):
     """Test regex extraction patterns to find the error"""
     
@@ -32,40 +56,27 @@ def debug_regex_extraction(text):
     # Initialize contract extractor (but we'll step through the regex manually)
     contract_extractor = EnhancedContractExtractor(model="pixtral")
     
-    # This is the regex that's likely causing the issue
-    patterns = {
-        "contract_number": [
-            r"(?i)CONTRACT\s+NUMBER:?\s*([A-Z0-9]+-[A-Z0-9]+-[A-Z0-9]+)",
-            r"(?i)CONTRACT\s+(?:NO|NUMBER|#):?\s*([A-Z0-9\-]+)"
-        ],
-        "client_name": [
-            r"(?i)Between:[\s\n]*([A-Za-z0-9\s]+)(?:\s*\(.*?Client.*?\))?",
-            r"(?i)CLIENT:?\s*([A-Za-z0-9\s,\.]+)",
-            r"(?i)(?:CLIENT|CUSTOMER):?\s*([A-Za-z0-9\s]+(?:Ltd\.?|LLC|Inc\.?|Corporation|Corp\.?|GmbH)?)"
-        ],
-        # ...and more fields
-    }
-    
     # Test each regex pattern individually
-    for field, field_patterns in patterns.items():
+    for field, field_patterns in _DEBUG_PATTERNS.items():
         for pattern in field_patterns:
             try:
-                logger.info(f"Testing pattern for {field}: {pattern}")
-                match = re.search(pattern, text)
+                logger.info(f"Testing pattern for {field}: {pattern.pattern}")
+                match = pattern.search(text)
                 if match:
                     logger.info(f"  Match found: {match.group(0)}")
                     # Try to access all groups
                     for i in range(1, len(match.groups()) + 1):
                         logger.info(f"  Group {i}: {match.group(i)}")
             except Exception as e:
-                logger.error(f"ERROR in pattern '{pattern}': {str(e)}")
+                logger.error(f"ERROR in pattern '{pattern.pattern}': {str(e)}")
                 logger.error(format_exc())
     
     # Now test the full extraction method with detailed try/except
     try:
         logger.info("Testing full _extract_contract_with_regex method")
         result = contract_extractor._extract_contract_with_regex(text)
-        logger.info(f"Success! Results: {json.dumps(result, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Success! Results: %s", json.dumps(result))
     except Exception as e:
         logger.error(f"ERROR in full extraction: {str(e)}")
         logger.error(format_exc())
@@ -87,7 +98,8 @@ def debug_regex_extraction(text):
         }
         regex_data = contract_extractor._extract_contract_with_regex(text)
         contract_extractor._augment_with_regex(ai_data, regex_data)
-        logger.info(f"Success! Augmented data: {json.dumps(ai_data, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Success! Augmented data: %s", json.dumps(ai_data))
     except Exception as e:
         logger.error(f"ERROR in augmentation: {str(e)}")
         logger.error(format_exc())
@@ -96,7 +108,8 @@ def debug_regex_extraction(text):
     try:
         logger.info("Testing complete extract_data method")
         result = contract_extractor.extract_data(text, "contract")
-        logger.info(f"Success! Final results: {json.dumps(result, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Success! Final results: %s", json.dumps(result))
     except Exception as e:
         logger.error(f"ERROR in extract_data: {str(e)}")
         logger.error(format_exc())
@@ -106,28 +119,26 @@ def main():
     uploads_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
     
     # Find the most recent contract PDF in the uploads directory
-    contract_files = []
-    for filename in os.listdir(uploads_dir):
-        if filename.startswith("contract_") and filename.endswith(".pdf"):
-            contract_files.append(os.path.join(uploads_dir, filename))
+    with os.scandir(uploads_dir) as entries:
+        contract_files = [
+            (entry.path, entry.stat().st_mtime)
+            for entry in entries
+            if entry.name.startswith("contract_") and entry.name.endswith(".pdf") and entry.is_file()
+        ]
     
     if not contract_files:
         logger.error("No contract PDF files found in uploads directory")
         return
     
     # Get the most recent one
-    contract_file = max(contract_files, key=os.path.getmtime)
+    contract_file = max(contract_files, key=lambda candidate: candidate[1])[0]
     logger.info(f"Using contract file: {contract_file}")
     
     # Extract text from the PDF
     try:
-        import pypdf
-        with open(contract_file, "rb") as f:
-            reader = pypdf.PdfReader(f)
-            text = ""
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text + "\n\n"
+        import fitz  # PyMuPDF
+        with fitz.open(contract_file) as doc:
+            text = "".join(page.get_text() + "\n\n" for page in doc)
         
         # Run the debug
         debug_regex_extraction(text)
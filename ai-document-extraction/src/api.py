@@ -2,28 +2,34 @@
 import os
 import sys
 import logging
-import shutil
 import json
+import hashlib
+import time
+import uuid
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Query, Path
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from mangum import Mangum
 import uvicorn
 from pydantic import BaseModel
+import aiofiles
 
 # Add project root to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.document_processor import DocumentProcessor
-from utils.ai_extractor import AIExtractor
+from utils.ai_extractor import AIExtractor, close_http_client
 from utils.quickbooks_integration import QuickBooksIntegration
 from utils.database import DatabaseManager
+from utils import llm_cache
 from config.config import (
     INPUT_DIR, OUTPUT_DIR, API_HOST, API_PORT, 
-    DOCUMENT_TYPES, OUTPUT_FORMATS, IS_VERCEL, 
+    DOCUMENT_TYPES, DOCUMENT_TYPES_KEYS, OUTPUT_FORMATS, OUTPUT_FORMATS_SET, IS_VERCEL, 
     VERCEL_ENV, S3_BUCKET_NAME
 )
 
@@ -31,10 +37,13 @@ from config.config import (
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize database
+# Validation error messages, formatted once
+_UNSUPPORTED_DOCUMENT_TYPE = "Unsupported document type: {}. Supported types: " + str(list(DOCUMENT_TYPES_KEYS))
+_UNSUPPORTED_OUTPUT_FORMAT = "Unsupported output format: {}. Supported formats: " + str(OUTPUT_FORMATS)
+
+# Initialize database (tables are created on startup; calls run in the threadpool
+# so the blocking ORM work doesn't stall the event loop)
 db_manager = DatabaseManager()
-if not IS_VERCEL:
-    db_manager.create_tables()
 
 # Initialize QuickBooks integration
 quickbooks = QuickBooksIntegration()
@@ -60,6 +69,37 @@ if not IS_VERCEL:
     os.makedirs(INPUT_DIR, exist_ok=True)
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+@lru_cache(maxsize=None)
+def get_document_processor(document_type: str) -> DocumentProcessor:
+    """Return the shared DocumentProcessor for a document type"""
+    return DocumentProcessor(document_type)
+
+@lru_cache(maxsize=None)
+def get_ai_extractor() -> AIExtractor:
+    """Return the shared AIExtractor"""
+    return AIExtractor()
+
+@app.on_event("startup")
+async def create_database_tables():
+    """Create the database tables when the app starts rather than at import"""
+    if not IS_VERCEL:
+        await run_in_threadpool(db_manager.create_tables)
+
+@app.on_event("startup")
+async def warm_extractors():
+    """Build the processors and AI extractor up front so the first request doesn't pay for it"""
+    try:
+        for document_type in DOCUMENT_TYPES:
+            get_document_processor(document_type)
+        get_ai_extractor()
+    except Exception as e:
+        logger.warning(f"Could not pre-initialize extractors: {str(e)}")
+
+@app.on_event("shutdown")
+def close_ai_http_client():
+    """Close the pooled connections to the AI provider"""
+    close_http_client()
+
 # Define response models
 class ExtractionResponse(BaseModel):
     document_id: int
@@ -105,6 +145,11 @@ async def health_check():
         "environment": VERCEL_ENV if IS_VERCEL else "development"
     }
 
+async def archive_upload(input_path: str, data: bytes):
+    """Write an uploaded document to the input directory"""
+    async with aiofiles.open(input_path, "wb") as buffer:
+        await buffer.write(data)
+
 @app.post("/extract", response_model=ExtractionResponse)
 async def extract_document(
     file: UploadFile = File(...),
@@ -127,62 +172,67 @@ async def extract_document(
     """
     # Validate input
     if document_type not in DOCUMENT_TYPES:
-        raise HTTPException(status_code=400, detail=f"Unsupported document type: {document_type}. Supported types: {list(DOCUMENT_TYPES.keys())}")
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_DOCUMENT_TYPE.format(document_type))
     
-    if output_format not in OUTPUT_FORMATS:
-        raise HTTPException(status_code=400, detail=f"Unsupported output format: {output_format}. Supported formats: {OUTPUT_FORMATS}")
+    if output_format not in OUTPUT_FORMATS_SET:
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_OUTPUT_FORMAT.format(output_format))
     
     try:
         # Save the uploaded file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        input_filename = f"{timestamp}_{file.filename}"
+        timestamp = f"{time.time_ns():x}"
+        input_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{file.filename}"
         input_path = os.path.join(INPUT_DIR, input_filename)
         
         # Get file info
-        file_size = file.size
         file_extension = os.path.splitext(file.filename)[1].lower()
         
-        # Add document to database
-        document = db_manager.add_document(
-            filename=file.filename,
-            document_type=document_type,
-            file_path=input_path,
-            file_size=file_size,
-            file_extension=file_extension
-        )
-        
         # Save file to disk (or S3 if in Vercel environment)
         if IS_VERCEL and S3_BUCKET_NAME:
             # TODO: Implement S3 file storage for Vercel environment
             # For now, we'll raise an error
             raise HTTPException(status_code=501, detail="S3 storage not implemented yet for Vercel environment")
         else:
-            with open(input_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            # Read the upload once and archive it before it is recorded in the database;
+            # the document is then processed from memory
+            data = await file.read()
+            file_size = len(data)
+            file_hash = hashlib.sha256(data)
+            await archive_upload(input_path, data)
+        
+        # Add document to database
+        document = await run_in_threadpool(
+            db_manager.add_document,
+            filename=file.filename,
+            document_type=document_type,
+            file_path=input_path,
+            file_size=file_size,
+            file_extension=file_extension,
+            file_hash=file_hash.hexdigest()
+        )
         
-        # Create document processor
-        processor = DocumentProcessor(document_type)
+        # Get the document processor
+        processor = get_document_processor(document_type)
         
-        # Process document to extract text and basic data
-        extracted_data = processor.process_document(input_path)
+        # Parse the in-memory upload once and reuse its text for the AI step. Parsing
+        # and OCR run on the threadpool so other requests are served meanwhile
+        extracted_data, text = await run_in_threadpool(processor.process_bytes, data, file_extension, input_path)
         
         # If AI extraction is enabled
         if use_ai:
             logger.info("Using AI for enhanced extraction")
-            text = ""
-            
-            # Extract text based on file type
-            if file_extension == '.pdf':
-                text = processor._extract_text_from_pdf(input_path)
-            elif file_extension in ['.jpg', '.jpeg', '.png', '.tiff', '.bmp']:
-                text = processor._extract_text_from_image(input_path)
-            elif file_extension in ['.docx', '.doc']:
-                text = processor._extract_text_from_docx(input_path)
             
             if text:
                 # Use AI to extract data
-                ai_extractor = AIExtractor()
-                ai_data = ai_extractor.extract_data(text, document_type)
+                ai_extractor = get_ai_extractor()
+                cache_key = llm_cache.make_key(ai_extractor.model, document_type, text)
+                ai_data = llm_cache.get(cache_key)
+                if ai_data is None:
+                    # The model call blocks for seconds, so it waits on the threadpool rather
+                    # than holding up the event loop, and concurrent uploads overlap
+                    ai_data, from_model = await run_in_threadpool(ai_extractor.extract_data_with_status, text, document_type)
+                    # Regex or placeholder results from a missing key or a failed API call are not kept
+                    if ai_data and from_model:
+                        llm_cache.set(cache_key, ai_data)
                 
                 # Update extracted_data with AI results (prefer AI results when available)
                 if ai_data:
@@ -192,7 +242,7 @@ async def extract_document(
         
         # Add extracted data to database
         extraction_method = "ai" if use_ai else "rule-based"
-        db_manager.add_extracted_data(document.id, extracted_data, extraction_method)
+        await run_in_threadpool(db_manager.add_extracted_data, document.id, extracted_data, extraction_method)
         
         # Generate output file path
         input_name = os.path.splitext(input_filename)[0]
@@ -207,11 +257,11 @@ async def extract_document(
             if document_type == "invoice":
                 quickbooks_id = quickbooks.create_invoice(extracted_data)
                 if quickbooks_id:
-                    db_manager.add_quickbooks_record(document.id, quickbooks_id, "invoice")
+                    await run_in_threadpool(db_manager.add_quickbooks_record, document.id, quickbooks_id, "invoice")
             elif document_type == "contract":
                 quickbooks_id = quickbooks.create_contract(extracted_data)
                 if quickbooks_id:
-                    db_manager.add_quickbooks_record(document.id, quickbooks_id, "contract")
+                    await run_in_threadpool(db_manager.add_quickbooks_record, document.id, quickbooks_id, "contract")
         
         logger.info(f"Successfully processed {input_path} and saved to {output_path}")
         
@@ -235,7 +285,7 @@ async def get_documents(document_type: Optional[str] = Query(None)):
     Returns:
         List of documents
     """
-    documents = db_manager.get_all_documents(document_type)
+    documents = await run_in_threadpool(db_manager.get_all_documents, document_type)
     return [
         {
             "id": doc.id,
@@ -257,11 +307,11 @@ async def get_document_data(document_id: int = Path(...)):
     Returns:
         Document data
     """
-    document = db_manager.get_document(document_id)
+    document = await run_in_threadpool(db_manager.get_document, document_id)
     if not document:
         raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
     
-    extracted_data = db_manager.get_extracted_data(document_id)
+    extracted_data = await run_in_threadpool(db_manager.get_extracted_data, document_id)
     
     return {
         "id": document.id,
@@ -282,11 +332,11 @@ async def send_to_quickbooks(document_id: int = Path(...)):
     Returns:
         QuickBooks integration status
     """
-    document = db_manager.get_document(document_id)
+    document = await run_in_threadpool(db_manager.get_document, document_id)
     if not document:
         raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
     
-    extracted_data = db_manager.get_extracted_data(document_id)
+    extracted_data = await run_in_threadpool(db_manager.get_extracted_data, document_id)
     if not extracted_data:
         raise HTTPException(status_code=404, detail=f"Extracted data not found for document: {document_id}")
     
@@ -303,7 +353,7 @@ async def send_to_quickbooks(document_id: int = Path(...)):
         raise HTTPException(status_code=500, detail="Failed to send data to QuickBooks")
     
     # Add QuickBooks record to database
-    quickbooks_record = db_manager.add_quickbooks_record(document_id, quickbooks_id, record_type)
+    quickbooks_record = await run_in_threadpool(db_manager.add_quickbooks_record, document_id, quickbooks_id, record_type)
     
     return {
         "document_id": document_id,
@@ -337,7 +387,7 @@ async def get_document_types():
     Returns:
         List of supported document types
     """
-    return {"document_types": list(DOCUMENT_TYPES.keys())}
+    return {"document_types": list(DOCUMENT_TYPES_KEYS)}
 
 @app.get("/output-formats")
 async def get_output_formats():
@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.document_processor import DocumentProcessor
 from utils.ai_extractor import AIExtractor
+from utils import llm_cache
 from config.config import INPUT_DIR, OUTPUT_DIR, DOCUMENT_TYPES, OUTPUT_FORMATS
 
 # Configure logging
@@ -51,23 +52,23 @@ def process_document(input_path, document_type, output_format, use_ai=False):
         # If AI extraction is enabled and we have text
         if use_ai:
             logger.info("Using AI for enhanced extraction")
-            text = ""
             
             # Get the file extension
             file_extension = os.path.splitext(input_path)[1].lower()
             
-            # Extract text based on file type
-            if file_extension == '.pdf':
-                text = processor._extract_text_from_pdf(input_path)
-            elif file_extension in ['.jpg', '.jpeg', '.png', '.tiff', '.bmp']:
-                text = processor._extract_text_from_image(input_path)
-            elif file_extension in ['.docx', '.doc']:
-                text = processor._extract_text_from_docx(input_path)
+            # Extract text based on file type (process_document has already rejected unsupported types)
+            text = processor.extract_text(input_path, file_extension)
             
             if text:
-                # Use AI to extract data
+                # Use AI to extract data, reusing the result for a document seen before
                 ai_extractor = AIExtractor()
-                ai_data = ai_extractor.extract_data(text, document_type)
+                cache_key = llm_cache.make_key(ai_extractor.model, document_type, text)
+                ai_data = llm_cache.get(cache_key)
+                if ai_data is None:
+                    ai_data, from_model = ai_extractor.extract_data_with_status(text, document_type)
+                    # Regex or placeholder results from a missing key or a failed API call are not kept
+                    if ai_data and from_model:
+                        llm_cache.set(cache_key, ai_data)
                 
                 # Update extracted_data with AI results (prefer AI results when available)
                 if ai_data:
@@ -1,24 +1,39 @@
 #!/usr/bin/env python3
 import os
+import io
 import sys
+import json
+import asyncio
+import hashlib
 import logging
 import shutil
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import subprocess
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import List, Optional, Dict, Any, Union
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query, Path
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, ORJSONResponse
 import uvicorn
 from pydantic import BaseModel
+import aiofiles
 import re
-import pypdf  # Add import for PDF processing
 import traceback
 
+try:
+    import fitz  # PyMuPDF, much faster than pypdf for text extraction
+except ImportError:
+    fitz = None
+
 # Add project root to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.ai_extractor import AIExtractor
+from utils.ai_extractor import AIExtractor, close_http_client
 from utils.contract_extractor import EnhancedContractExtractor
+from utils import llm_cache
 from config.config import (
     INPUT_DIR, OUTPUT_DIR, API_HOST, API_PORT, 
     DOCUMENT_TYPES, OUTPUT_FORMATS, DEFAULT_AI_MODEL
@@ -37,7 +52,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="AI Document Extraction API",
     description="API for extracting data from documents using AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -49,25 +65,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# extract_text_from_pdf returns a message starting with this in place of the text of a PDF
+# it can't read, and a marker line matching _PAGE_ERROR_RE for each page it can't read
+PDF_ERROR_PREFIX = "Error processing PDF document: "
+_PAGE_ERROR_RE = re.compile(r"^\[Error extracting page \d+\]$", re.MULTILINE)
+
+# Background extraction jobs by ID, oldest first; kept in memory, so they are per process.
+# Only finished jobs are forgotten to make room for new ones
+EXTRACTION_JOBS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+MAX_EXTRACTION_JOBS = 1000
+FINISHED_JOB_STATUSES = frozenset({"completed", "failed"})
+
+# Poppler's pdftotext binary, if installed; used when PyMuPDF is not available
+PDFTOTEXT_PATH = shutil.which("pdftotext")
+
+# PDFs with at least this many pages have their pages split across a process pool.
+# PyMuPDF holds the GIL while extracting, so threads would not run pages in parallel
+PARALLEL_PDF_PAGE_THRESHOLD = 16
+PDF_WORKERS = min(8, os.cpu_count() or 1)
+
+# Blocking PDF parsing runs on this pool so the event loop keeps serving requests
+PDF_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# AI calls spend nearly all their time waiting on the provider, so they get their own,
+# larger pool; its size caps how many requests are in flight to the API at once. The regex
+# passes inside extract_data hold the GIL for only about a millisecond per document, too
+# little for a process pool to pay back pickling the text and result across processes
+AI_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
 # Initialize extractors
 extractor = AIExtractor(model=DEFAULT_AI_MODEL)
 contract_extractor = EnhancedContractExtractor(model=DEFAULT_AI_MODEL)
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from a PDF file with detailed logging"""
+@app.on_event("shutdown")
+def close_ai_http_client():
+    """Close the pooled connections to the AI provider"""
+    close_http_client()
+
+def extract_text_from_pdf(source: Union[str, bytes], max_chars: Optional[int] = None) -> str:
+    """
+    Extract text from a PDF file, or its raw bytes, with detailed logging
+    
+    Args:
+        source: Path to the PDF or its raw bytes
+        max_chars: Stop reading pages once this much text has been extracted; callers
+            that only use the start of the text don't pay to parse the rest of the document
+    """
+    if fitz is not None:
+        return _extract_text_with_pymupdf(source, max_chars)
+    
+    if PDFTOTEXT_PATH:
+        text = _extract_text_with_pdftotext(source)
+        if text is not None:
+            return text
+    
     try:
-        # Use the global import that's already at the top of the file
-        logger.debug(f"Extracting text from PDF: {file_path}")
+        logger.debug(f"Extracting text from PDF: {_describe_pdf(source)}")
         
         try:
-            import pypdf  # Try importing locally to ensure it's available
+            import pypdf  # Fallback when PyMuPDF isn't installed
             logger.debug("Successfully imported pypdf")
             
-            # Try to extract text directly from PDF
-            reader = pypdf.PdfReader(file_path)
+            # Try to extract text directly from PDF. Given a path, pypdf reads the whole file
+            # into memory with a single read, so the parse never hits unbuffered file I/O
+            reader = pypdf.PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
             logger.debug(f"PDF has {len(reader.pages)} pages")
             text = ""
             for i, page in enumerate(reader.pages):
+                if max_chars is not None and len(text) >= max_chars:
+                    logger.debug(f"Stopped after {i} pages with {len(text)} characters")
+                    break
                 try:
                     page_text = page.extract_text() or ""
                     text += page_text + "\n"
@@ -80,14 +150,109 @@ def extract_text_from_pdf(file_path: str) -> str:
             return text
         except Exception as pdf_error:
             logger.error(f"Error in PDF extraction: {str(pdf_error)}")
-            return f"Error processing PDF document: {str(pdf_error)}"
+            return f"{PDF_ERROR_PREFIX}{str(pdf_error)}"
             
     except ImportError:
         logger.warning("pypdf module not available, using fallback approach")
         return "This is a PDF document that requires the pypdf module for text extraction."
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
-        return f"Error processing PDF document: {str(e)}"
+        return f"{PDF_ERROR_PREFIX}{str(e)}"
+
+def text_extraction_failed(text: str) -> bool:
+    """Whether extract_text_from_pdf could not read the document, or some of its pages"""
+    return text.startswith(PDF_ERROR_PREFIX) or _PAGE_ERROR_RE.search(text) is not None
+
+def _describe_pdf(source: Union[str, bytes]) -> str:
+    """Describe a PDF source for log messages"""
+    return f"<{len(source)} bytes>" if isinstance(source, bytes) else source
+
+def _open_pdf(source: Union[str, bytes]):
+    """Open a PDF with PyMuPDF from a path or from its raw bytes"""
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+@lru_cache(maxsize=None)
+def _pdf_pool() -> ProcessPoolExecutor:
+    """Start the PDF page pool on first use and keep it for later requests"""
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS)
+
+def _extract_page_text(doc, page_num: int) -> str:
+    """Extract the text of one page, returning an error marker if it fails"""
+    try:
+        # MuPDF's text device already ignores path and fill operators, so graphics-heavy
+        # pages need no special flags; dropping whitespace preservation measured no faster
+        page_text = doc[page_num].get_text("text")
+        logger.debug(f"Page {page_num+1} extracted {len(page_text)} characters")
+        return page_text + "\n"
+    except Exception as page_error:
+        logger.error(f"Error extracting text from page {page_num+1}: {str(page_error)}")
+        return f"[Error extracting page {page_num+1}]\n"
+
+def _extract_page_range(source: Union[str, bytes], start: int, stop: int) -> List[str]:
+    """Extract a range of pages in a pool worker; fitz documents cannot be shared across processes"""
+    with _open_pdf(source) as doc:
+        return [_extract_page_text(doc, page_num) for page_num in range(start, stop)]
+
+def _extract_text_with_pymupdf(source: Union[str, bytes], max_chars: Optional[int] = None) -> str:
+    """Extract text from a PDF file or its raw bytes using PyMuPDF"""
+    logger.debug(f"Extracting text from PDF with PyMuPDF: {_describe_pdf(source)}")
+    try:
+        with _open_pdf(source) as doc:
+            page_count = len(doc)
+            logger.debug(f"PDF has {page_count} pages")
+            # With a character limit the first few pages are usually enough, so read them in order
+            parallel = page_count >= PARALLEL_PDF_PAGE_THRESHOLD and PDF_WORKERS > 1 and max_chars is None
+            if not parallel:
+                page_texts = []
+                char_count = 0
+                for page_num in range(page_count):
+                    if max_chars is not None and char_count >= max_chars:
+                        logger.debug(f"Stopped after {page_num} pages with {char_count} characters")
+                        break
+                    page_texts.append(_extract_page_text(doc, page_num))
+                    char_count += len(page_texts[-1])
+        
+        if parallel:
+            # Give each worker one contiguous range of pages so it opens the document once
+            step = -(-page_count // PDF_WORKERS)
+            starts = range(0, page_count, step)
+            ranges = _pdf_pool().map(
+                _extract_page_range,
+                [source] * len(starts),
+                starts,
+                [min(start + step, page_count) for start in starts]
+            )
+            page_texts = [page_text for page_range in ranges for page_text in page_range]
+        
+        text = "".join(page_texts)
+        logger.debug(f"Total text extracted: {len(text)} characters")
+        return text
+    except Exception as e:
+        logger.error(f"Error in PDF extraction: {str(e)}")
+        return f"{PDF_ERROR_PREFIX}{str(e)}"
+
+def _extract_text_with_pdftotext(source: Union[str, bytes]) -> Optional[str]:
+    """Extract text from a PDF file or its raw bytes with Poppler's pdftotext, returning None on failure"""
+    logger.debug(f"Extracting text from PDF with pdftotext: {_describe_pdf(source)}")
+    try:
+        if isinstance(source, bytes):
+            # Feed the document through stdin
+            result = subprocess.run([PDFTOTEXT_PATH, "-", "-"], input=source, capture_output=True, timeout=30)
+        else:
+            result = subprocess.run([PDFTOTEXT_PATH, source, "-"], capture_output=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"pdftotext failed, falling back to pypdf: {str(e)}")
+        return None
+    
+    if result.returncode != 0:
+        logger.warning(f"pdftotext exited with {result.returncode}, falling back to pypdf")
+        return None
+    
+    text = result.stdout.decode("utf-8", "replace")
+    logger.debug(f"Total text extracted: {len(text)} characters")
+    return text
 
 class ExtractionResponse(BaseModel):
     filename: str
@@ -118,64 +283,103 @@ async def health_check():
         "model": extractor.model
     }
 
+# Filename terms for each document type, checked in this order
+_INVOICE_RE = re.compile(r"invoice|inv|bill", re.IGNORECASE)
+_CONTRACT_RE = re.compile(r"contract|agreement|legal", re.IGNORECASE)
+_RECEIPT_RE = re.compile(r"receipt|payment", re.IGNORECASE)
+
 def detect_document_type(filename: str) -> str:
     """
     Detect document type based on filename
     """
-    filename = filename.lower()
-    
-    if any(term in filename for term in ["invoice", "inv", "bill"]):
+    if _INVOICE_RE.search(filename):
         return "invoice"
-    elif any(term in filename for term in ["contract", "agreement", "legal"]):
+    elif _CONTRACT_RE.search(filename):
         return "contract"
-    elif any(term in filename for term in ["receipt", "payment"]):
+    elif _RECEIPT_RE.search(filename):
         return "receipt"
     else:
         # Default to invoice if we can't determine
         return "invoice"
 
-@app.post("/extract")
-async def extract_document(file: UploadFile = File(...), doc_type: str = Form("auto")):
+async def save_upload(file: UploadFile, doc_type: str):
     """
-    Extract structured data from uploaded document
+    Save an uploaded document under uploads/
+    
+    Returns:
+        Tuple of the saved file path and the SHA-256 hex digest of its contents
     """
+    # Create uploads directory if it doesn't exist
+    if not os.path.exists("uploads"):
+        os.makedirs("uploads")
+    
+    # Generate a unique filename to prevent overwrites
+    timestamp = f"{time.time_ns():x}"
+    file_ext = os.path.splitext(file.filename)[1]
+    safe_filename = f"{doc_type}_{timestamp}_{uuid.uuid4().hex[:8]}{file_ext}"
+    file_path = os.path.join("uploads", safe_filename)
+    
+    # Stream the upload to disk in chunks, hashing it on the way
+    file_hash = hashlib.sha256()
+    async with aiofiles.open(file_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            file_hash.update(chunk)
+            await f.write(chunk)
+    logger.info(f"Saved uploaded file to {file_path}")
+    return file_path, file_hash.hexdigest()
+
+def discard_upload(file_path: str):
+    """Remove a saved upload that doesn't need to be kept"""
     try:
-        logger.info(f"Received file: {file.filename}, type: {doc_type}")
-        
-        # Determine document type if auto-detection is requested
-        if doc_type == "auto":
-            doc_type = detect_document_type(file.filename)
-            logger.info(f"Auto-detected document type: {doc_type}")
-        
-        # Create uploads directory if it doesn't exist
-        if not os.path.exists("uploads"):
-            os.makedirs("uploads")
-        
-        # Generate a unique filename to prevent overwrites
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_ext = os.path.splitext(file.filename)[1]
-        safe_filename = f"{doc_type}_{timestamp}{file_ext}"
-        file_path = os.path.join("uploads", safe_filename)
-        
-        # Save the uploaded file
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-        logger.info(f"Saved uploaded file to {file_path}")
-        
+        os.remove(file_path)
+    except OSError as e:
+        logger.warning(f"Could not remove upload {file_path}: {str(e)}")
+
+async def run_extraction(
+    file_path: str,
+    content_hash: str,
+    filename: str,
+    doc_type: str,
+    no_cache: bool = False,
+    retain: bool = False
+) -> Dict[str, Any]:
+    """
+    Extract structured data from a saved upload and build the API response.
+    The upload is removed afterwards unless retain is set
+    """
+    try:
+        return await _run_extraction(file_path, content_hash, filename, doc_type, no_cache)
+    finally:
+        if not retain:
+            discard_upload(file_path)
+
+async def _run_extraction(file_path: str, content_hash: str, filename: str, doc_type: str, no_cache: bool) -> Dict[str, Any]:
+    """Extract structured data from a saved upload and build the API response"""
+    # Uses the module-level extractor; AIExtractor only holds configuration, so it is safe to share.
+    # Results are cached by the SHA-256 of the upload, so a file seen before skips text extraction
+    # as well as the model call; the cache does disk I/O, so it runs on the executor
+    loop = asyncio.get_running_loop()
+    cache_key = llm_cache.make_file_key(extractor.model, doc_type, content_hash)
+    cached = None if no_cache else await loop.run_in_executor(PDF_EXECUTOR, llm_cache.get, cache_key)
+    if cached:
+        logger.info(f"Using cached extraction for {filename} ({content_hash})")
+        extracted_data = cached["extracted_data"]
+        extraction_method = cached["extraction_method"]
+    else:
         # Extract text from PDF
         logger.info(f"Processing PDF file: {file_path}")
-        text_content = extract_text_from_pdf(file_path)
-        
-        # Create the extractor
-        extractor = AIExtractor()
+        # The extractor only sends the first max_tokens characters to the model (Pixtral
+        # included, which gets the text alongside the first page image), so stop there
+        text_content = await loop.run_in_executor(PDF_EXECUTOR, extract_text_from_pdf, file_path, extractor.max_tokens)
         
         # Extract structured data using AI
         # Always pass the file_path for potential multimodal extraction
-        extracted_data = extractor.extract_data(
+        extracted_data, from_model = await loop.run_in_executor(AI_EXECUTOR, partial(
+            extractor.extract_data_with_status,
             document_content=text_content,
             document_type=doc_type,
             image_path=file_path
-        )
+        ))
         
         # Log detailed extracted data for debugging
         logger.info(f"Extracted data fields: {list(extracted_data.keys())}")
@@ -196,31 +400,233 @@ async def extract_document(file: UploadFile = File(...), doc_type: str = Form("a
         
         logger.info(f"Extraction complete using {extraction_method} extraction")
         
-        # Return the extracted data with metadata
-        response_data = {
-            "success": True,
+        # Regex or placeholder results from a missing key or a failed API call are not kept, nor
+        # results for a document that couldn't be read, so an upload of the same file retries it
+        if extracted_data and from_model and not text_extraction_failed(text_content):
+            await loop.run_in_executor(PDF_EXECUTOR, llm_cache.set, cache_key, {
+                "extracted_data": extracted_data,
+                "extraction_method": extraction_method
+            })
+    
+    # Return the extracted data with metadata
+    response_data = {
+        "success": True,
+        "document_type": doc_type,
+        "extraction_method": extraction_method,  # This should match what the frontend expects
+        "filename": filename,
+        "data": {
+            # Add extraction_method to the data object as well, which is what ResultDisplay.js uses
+            "extraction_method": extraction_method,
             "document_type": doc_type,
-            "extraction_method": extraction_method,  # This should match what the frontend expects
-            "filename": file.filename,
-            "data": {
-                # Add extraction_method to the data object as well, which is what ResultDisplay.js uses
-                "extraction_method": extraction_method,
-                "document_type": doc_type,
-                **extracted_data
-            }
+            **extracted_data
         }
+    }
+    
+    # Log the final response structure to verify
+    logger.info(f"Response data structure: {list(response_data.keys())}")
+    logger.info(f"Response data['data'] structure: {list(response_data['data'].keys())}")
+    
+    return response_data
+
+@app.post("/extract")
+async def extract_document(
+    file: UploadFile = File(...),
+    doc_type: str = Form("auto"),
+    no_cache: bool = Query(False),
+    retain: bool = Query(False)
+):
+    """
+    Extract structured data from uploaded document
+    """
+    try:
+        logger.info(f"Received file: {file.filename}, type: {doc_type}")
         
-        # Log the final response structure to verify
-        logger.info(f"Response data structure: {list(response_data.keys())}")
-        logger.info(f"Response data['data'] structure: {list(response_data['data'].keys())}")
+        # Determine document type if auto-detection is requested
+        if doc_type == "auto":
+            doc_type = detect_document_type(file.filename)
+            logger.info(f"Auto-detected document type: {doc_type}")
         
-        return response_data
+        file_path, content_hash = await save_upload(file, doc_type)
+        return await run_extraction(file_path, content_hash, file.filename, doc_type, no_cache, retain)
         
     except Exception as e:
         logger.error(f"Error extracting data: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+async def run_extraction_job(job_id: str, job: Dict[str, Any], file_path: str, content_hash: str, filename: str, doc_type: str, no_cache: bool, retain: bool):
+    """Run a queued extraction and record its result on the job"""
+    job["status"] = "running"
+    try:
+        job["result"] = await run_extraction(file_path, content_hash, filename, doc_type, no_cache, retain)
+        job["status"] = "completed"
+    except Exception as e:
+        logger.error(f"Error in extraction job {job_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        job["error"] = str(e)
+        job["status"] = "failed"
+    finally:
+        job.pop("task", None)
+
+def forget_finished_jobs():
+    """Forget the oldest completed or failed jobs until there is room for a new job"""
+    if len(EXTRACTION_JOBS) < MAX_EXTRACTION_JOBS:
+        return
+    finished = [job_id for job_id, job in EXTRACTION_JOBS.items() if job["status"] in FINISHED_JOB_STATUSES]
+    for job_id in finished:
+        if len(EXTRACTION_JOBS) < MAX_EXTRACTION_JOBS:
+            break
+        del EXTRACTION_JOBS[job_id]
+
+@app.post("/extract/jobs")
+async def create_extraction_job(
+    file: UploadFile = File(...),
+    doc_type: str = Form("auto"),
+    no_cache: bool = Query(False),
+    retain: bool = Query(False)
+):
+    """
+    Save an uploaded document and queue its extraction, returning a job ID to poll
+    """
+    try:
+        logger.info(f"Received file for background extraction: {file.filename}, type: {doc_type}")
+        
+        # Determine document type if auto-detection is requested
+        if doc_type == "auto":
+            doc_type = detect_document_type(file.filename)
+            logger.info(f"Auto-detected document type: {doc_type}")
+        
+        file_path, content_hash = await save_upload(file, doc_type)
+    except Exception as e:
+        logger.error(f"Error saving upload: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Forget the oldest finished jobs once the store is full; pending and running jobs are kept
+    # until they finish, so new jobs are turned away while every slot holds one
+    forget_finished_jobs()
+    if len(EXTRACTION_JOBS) >= MAX_EXTRACTION_JOBS:
+        discard_upload(file_path)
+        raise HTTPException(status_code=503, detail="Too many extraction jobs in progress, try again later")
+    
+    job_id = uuid.uuid4().hex
+    job = {"status": "pending", "filename": file.filename, "document_type": doc_type}
+    EXTRACTION_JOBS[job_id] = job
+    # Keep a reference to the task on the job so it isn't garbage collected while running
+    job["task"] = asyncio.create_task(
+        run_extraction_job(job_id, job, file_path, content_hash, file.filename, doc_type, no_cache, retain)
+    )
+    
+    return {"job_id": job_id, "status": "pending"}
+
+@app.get("/extract/jobs/{job_id}")
+async def get_extraction_job(job_id: str = Path(...)):
+    """
+    Get the status of a queued extraction, and its result once completed
+    """
+    job = EXTRACTION_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Extraction job {job_id} not found")
+    
+    return {"job_id": job_id, **{key: value for key, value in job.items() if key != "task"}}
+
+async def extract_one(file: UploadFile, doc_type: str, no_cache: bool, retain: bool) -> Dict[str, Any]:
+    """Save and extract one file of a multi-file request, reporting failure in the result"""
+    try:
+        if doc_type == "auto":
+            doc_type = detect_document_type(file.filename)
+        
+        file_path, content_hash = await save_upload(file, doc_type)
+        return await run_extraction(file_path, content_hash, file.filename, doc_type, no_cache, retain)
+    except Exception as e:
+        logger.error(f"Error extracting data from {file.filename}: {str(e)}")
+        logger.error(traceback.format_exc())
+        return {"success": False, "filename": file.filename, "error": str(e)}
+
+@app.post("/extract-batch")
+async def extract_batch(
+    files: List[UploadFile] = File(...),
+    doc_type: str = Form("auto"),
+    no_cache: bool = Query(False),
+    retain: bool = Query(False)
+):
+    """
+    Extract structured data from several uploaded documents at once.
+    The files are processed concurrently and results are returned in upload order
+    """
+    logger.info(f"Received {len(files)} files for extraction, type: {doc_type}")
+    results = await asyncio.gather(*(extract_one(file, doc_type, no_cache, retain) for file in files))
+    return {"results": results}
+
+@app.post("/extract-bulk")
+async def extract_bulk(
+    files: List[UploadFile] = File(...),
+    doc_type: str = Form("auto"),
+    retain: bool = Query(False)
+):
+    """
+    Submit several documents for text-only AI extraction as one batch job.
+    Returns a batch ID to poll with /extract-bulk/{batch_id}; use /extract for interactive use
+    """
+    if not extractor.mistral_api_key:
+        raise HTTPException(status_code=503, detail="Bulk extraction requires a Mistral API key")
+    
+    try:
+        logger.info(f"Received {len(files)} files for bulk extraction, type: {doc_type}")
+        
+        # Save the uploads, then extract their text in parallel
+        doc_types = [detect_document_type(file.filename) if doc_type == "auto" else doc_type for file in files]
+        file_paths = [(await save_upload(file, file_doc_type))[0] for file, file_doc_type in zip(files, doc_types)]
+        loop = asyncio.get_running_loop()
+        try:
+            texts = await asyncio.gather(*(
+                loop.run_in_executor(PDF_EXECUTOR, extract_text_from_pdf, file_path) for file_path in file_paths
+            ))
+        finally:
+            if not retain:
+                for file_path in file_paths:
+                    discard_upload(file_path)
+        
+        # The custom ID carries the file name and type so results can be labelled without server state
+        documents = [
+            (json.dumps([index, file_doc_type, file.filename]), text, file_doc_type)
+            for index, (file, file_doc_type, text) in enumerate(zip(files, doc_types, texts))
+        ]
+        batch_id = await loop.run_in_executor(AI_EXECUTOR, extractor.create_batch, documents)
+        logger.info(f"Created extraction batch {batch_id} for {len(files)} files")
+        
+        return {"batch_id": batch_id, "file_count": len(files)}
+        
+    except Exception as e:
+        logger.error(f"Error creating bulk extraction: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/extract-bulk/{batch_id}")
+async def get_bulk_extraction(batch_id: str = Path(...)):
+    """
+    Get the status of a bulk extraction and, once finished, the extracted data for each file
+    """
+    try:
+        batch = await asyncio.get_running_loop().run_in_executor(AI_EXECUTOR, extractor.get_batch, batch_id)
+    except Exception as e:
+        logger.error(f"Error fetching extraction batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=502, detail=str(e))
+    
+    response_data = {"batch_id": batch_id, "status": batch["status"]}
+    if "results" in batch:
+        results = []
+        for custom_id, data in batch["results"].items():
+            index, file_doc_type, filename = json.loads(custom_id)
+            results.append({
+                "index": index,
+                "filename": filename,
+                "document_type": file_doc_type,
+                "data": {"extraction_method": "text-only", "document_type": file_doc_type, **data}
+            })
+        response_data["results"] = sorted(results, key=lambda result: result["index"])
+    return response_data
+
 @app.get("/document-types")
 async def get_document_types():
     return {"document_types": DOCUMENT_TYPES}
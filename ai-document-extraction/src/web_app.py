@@ -2,18 +2,16 @@ from flask import Flask, render_template, request, redirect, url_for, flash, jso
 import os
 import requests
 import json
-from pathlib import Path
 
 app = Flask(__name__)
 app.secret_key = "ai_document_extraction_secret_key"
 
 # Configuration
 API_URL = "http://localhost:9001"
-UPLOAD_FOLDER = Path("data/uploads")
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'txt'}
 
-# Create upload folder if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Shared session so requests to the API reuse a kept-alive connection
+api_session = requests.Session()
 
 # Helper functions
 def allowed_file(filename):
@@ -37,17 +35,12 @@ def upload_file():
         return redirect(request.url)
     
     if file and allowed_file(file.filename):
-        # Save file temporarily
-        filepath = UPLOAD_FOLDER / file.filename
-        file.save(filepath)
-        
-        # Send to API
+        # Send the upload straight to the API; the API archives its own copy
         try:
-            with open(filepath, 'rb') as f:
-                files = {'file': (file.filename, f)}
-                data = {'document_type': document_type}
-                response = requests.post(f"{API_URL}/extract", files=files, data=data)
-                
+            files = {'file': (file.filename, file.stream, file.mimetype)}
+            data = {'document_type': document_type}
+            response = api_session.post(f"{API_URL}/extract", files=files, data=data)
+            
             if response.status_code == 200:
                 result = response.json()
                 return render_template('result.html', filename=file.filename, 
@@ -67,7 +60,7 @@ def upload_file():
 @app.route('/health')
 def health():
     try:
-        response = requests.get(f"{API_URL}/health")
+        response = api_session.get(f"{API_URL}/health")
         return jsonify({
             "web_app": "healthy",
             "api": response.json()
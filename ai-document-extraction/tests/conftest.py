@@ -0,0 +1,127 @@
+import os
+import re
+import sys
+import json
+from functools import lru_cache
+
+import pytest
+
+# Make the project packages (config, utils, src) importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import diskcache
+
+from utils import ai_extractor, llm_cache
+
+# Documents in the tests carry a marker like DOC-1 in their text; the fake model echoes it back
+_MARKER_RE = re.compile(r"DOC-\d+")
+
+class FakeMistral:
+    """Stands in for the shared HTTP client, answering like the Mistral API"""
+
+    def __init__(self):
+        self.available = True
+        self.chat_calls = 0
+        self.batch_requests = []
+        self.batch_status = "SUCCESS"
+
+    def close(self):
+        pass
+
+    def _answer(self, body) -> dict:
+        """Extracted data for a chat completion request: the document's marker and a call counter"""
+        self.chat_calls += 1
+        marker = _MARKER_RE.search(json.dumps(body))
+        return {"document": marker.group(0) if marker else None, "call": self.chat_calls}
+
+    def _check_available(self, method: str, url: str):
+        if not self.available:
+            raise httpx.ConnectError("Mistral API unreachable", request=httpx.Request(method, url))
+
+    def post(self, url, **kwargs):
+        self._check_available("POST", url)
+        if url.endswith("/v1/chat/completions"):
+            content = json.dumps(self._answer(kwargs["json"]))
+            return _response("POST", url, json={"choices": [{"message": {"content": content}}]})
+        if url.endswith("/v1/files"):
+            _, jsonl, _ = kwargs["files"]["file"]
+            self.batch_requests = [json.loads(line) for line in jsonl.decode("utf-8").splitlines()]
+            return _response("POST", url, json={"id": "file-1"})
+        if url.endswith("/v1/batch/jobs"):
+            return _response("POST", url, json={"id": "batch-1"})
+        raise AssertionError(f"Unexpected POST {url}")
+
+    def get(self, url, **kwargs):
+        self._check_available("GET", url)
+        if url.endswith("/v1/batch/jobs/batch-1"):
+            job = {"id": "batch-1", "status": self.batch_status}
+            if self.batch_status == "SUCCESS":
+                job["output_file"] = "output-1"
+            return _response("GET", url, json=job)
+        if url.endswith("/v1/files/output-1/content"):
+            lines = [
+                json.dumps({
+                    "custom_id": request["custom_id"],
+                    "response": {"body": {"choices": [{"message": {"content": json.dumps(self._answer(request["body"]))}}]}}
+                })
+                for request in self.batch_requests
+            ]
+            return _response("GET", url, text="\n".join(lines))
+        raise AssertionError(f"Unexpected GET {url}")
+
+def _response(method: str, url: str, **kwargs) -> httpx.Response:
+    return httpx.Response(200, request=httpx.Request(method, url), **kwargs)
+
+@pytest.fixture
+def mistral(monkeypatch):
+    """Route the extractors' Mistral API calls to a FakeMistral"""
+    fake = FakeMistral()
+    # lru_cache-wrapped like the real one, which close_http_client relies on
+    monkeypatch.setattr(ai_extractor, "_http_client", lru_cache(maxsize=None)(lambda: fake))
+    return fake
+
+@pytest.fixture
+def llm_cache_store(tmp_path, monkeypatch):
+    """An empty LLM cache for the test"""
+    cache = diskcache.Cache(str(tmp_path / "llm_cache"))
+    monkeypatch.setattr(llm_cache, "_cache", lambda: cache)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_DISABLED", False)
+    yield cache
+    cache.close()
+
+def make_extractor(model: str = "mistral", api_key: str = "test-key") -> ai_extractor.AIExtractor:
+    """An AIExtractor for the given model, whatever keys the environment has"""
+    extractor = ai_extractor.AIExtractor(model="mistral")
+    extractor.model = model
+    extractor.mistral_api_key = api_key
+    return extractor
+
+@pytest.fixture
+def simple_api(tmp_path, monkeypatch, mistral, llm_cache_store):
+    """src.simple_api with its uploads and extraction cache under tmp_path and a Mistral extractor"""
+    from src import simple_api
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(simple_api, "extractor", make_extractor())
+    monkeypatch.setattr(simple_api, "EXTRACTION_JOBS", type(simple_api.EXTRACTION_JOBS)())
+    return simple_api
+
+@pytest.fixture
+def client(simple_api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(simple_api.app) as test_client:
+        yield test_client
+
+def make_pdf(text: str = "", shapes: int = 0) -> bytes:
+    """A one-page PDF with the given text, or shapes only, like a scanned page without OCR"""
+    import fitz
+
+    with fitz.open() as doc:
+        page = doc.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+        for i in range(shapes):
+            page.draw_rect(fitz.Rect(72 + 10 * i, 200, 100 + 10 * i, 230), color=(0, 0, 0), fill=(0.2, 0.2, 0.2))
+        return doc.tobytes()
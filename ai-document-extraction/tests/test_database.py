@@ -0,0 +1,42 @@
+import sqlalchemy as sa
+
+from utils import database
+
+def _old_schema_engine(path):
+    """A database created before Document.file_hash existed"""
+    engine = sa.create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(sa.text(
+            "CREATE TABLE documents (id INTEGER PRIMARY KEY, filename VARCHAR(255) NOT NULL, "
+            "document_type VARCHAR(50) NOT NULL, file_path VARCHAR(255) NOT NULL, file_size INTEGER, "
+            "file_extension VARCHAR(10), processed_at DATETIME)"
+        ))
+        connection.execute(sa.text(
+            "INSERT INTO documents (filename, document_type, file_path) VALUES ('old.pdf', 'invoice', 'uploads/old.pdf')"
+        ))
+    return engine
+
+def test_create_tables_adds_file_hash_to_existing_database(tmp_path, monkeypatch):
+    path = tmp_path / "old.db"
+    _old_schema_engine(path).dispose()
+    monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{path}")
+    
+    db_manager = database.DatabaseManager()
+    db_manager.create_tables()
+    
+    inspector = sa.inspect(db_manager.engine)
+    assert "file_hash" in {column["name"] for column in inspector.get_columns("documents")}
+    assert any(index["column_names"] == ["file_hash"] for index in inspector.get_indexes("documents"))
+    
+    document = db_manager.add_document("new.pdf", "invoice", "uploads/new.pdf", 10, ".pdf", "ab" * 32)
+    assert document.file_hash == "ab" * 32
+    assert sorted(d.filename for d in db_manager.get_all_documents()) == ["new.pdf", "old.pdf"]
+    
+    # Running it again on the now current schema changes nothing
+    db_manager.create_tables()
+
+def test_create_tables_on_new_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path / 'new.db'}")
+    db_manager = database.DatabaseManager()
+    db_manager.create_tables()
+    assert db_manager.add_document("a.pdf", "invoice", "uploads/a.pdf", file_hash="cd" * 32).file_hash == "cd" * 32
@@ -0,0 +1,109 @@
+from conftest import make_extractor, make_pdf
+from utils import llm_cache
+from utils.ai_extractor import _DUMMY_RECEIPT
+
+def _extract(client, name, content, doc_type="receipt"):
+    response = client.post("/extract", files={"file": (name, content, "application/pdf")}, data={"doc_type": doc_type})
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+def test_make_key_depends_on_file_hash():
+    text_only = llm_cache.make_key("pixtral", "invoice", "\n")
+    assert llm_cache.make_key("pixtral", "invoice", "\n") == text_only
+    assert llm_cache.make_key("pixtral", "invoice", "\n", "a" * 64) != text_only
+    assert llm_cache.make_key("pixtral", "invoice", "\n", "a" * 64) != llm_cache.make_key("pixtral", "invoice", "\n", "b" * 64)
+
+def test_make_file_key():
+    key = llm_cache.make_file_key("pixtral", "invoice", "a" * 64)
+    assert llm_cache.make_file_key("pixtral", "invoice", "a" * 64) == key
+    assert llm_cache.make_file_key("pixtral", "invoice", "b" * 64) != key
+    assert llm_cache.make_file_key("pixtral", "receipt", "a" * 64) != key
+    assert llm_cache.make_file_key("mistral", "invoice", "a" * 64) != key
+    assert llm_cache.make_key("pixtral", "invoice", "", "a" * 64) != key
+
+def test_extract_data_with_status_reports_model_answers(mistral):
+    data, from_model = make_extractor().extract_data_with_status("Receipt DOC-1", "receipt")
+    assert from_model is True
+    assert data == {"document": "DOC-1", "call": 1}
+
+def test_extract_data_with_status_reports_fallbacks(mistral):
+    mistral.available = False
+    for model in ("mistral", "pixtral"):
+        data, from_model = make_extractor(model).extract_data_with_status("Receipt DOC-1", "receipt")
+        assert from_model is False
+        assert data == _DUMMY_RECEIPT
+
+    # Without an API key there is no model call at all
+    mistral.available = True
+    assert make_extractor(api_key=None).extract_data_with_status("Receipt DOC-1", "receipt") == (_DUMMY_RECEIPT, False)
+    assert mistral.chat_calls == 0
+
+def test_invoice_regex_fast_path_is_not_a_model_answer(mistral):
+    text = "INVOICE\nInvoice #: INV-2023-4721\nDate: November 15, 2023\nTOTAL: $1,234.56\n"
+    extractor = make_extractor()
+    data, from_model = extractor.extract_data_with_status(text, "invoice")
+    assert from_model is False
+    assert data == extractor._extract_invoice_with_regex(text)
+    assert mistral.chat_calls == 0
+
+def test_repeated_upload_is_served_from_cache(client, simple_api, mistral, llm_cache_store, monkeypatch):
+    text_extractions = []
+    extract_text_from_pdf = simple_api.extract_text_from_pdf
+    def counting_extract_text_from_pdf(*args):
+        text_extractions.append(args)
+        return extract_text_from_pdf(*args)
+    monkeypatch.setattr(simple_api, "extract_text_from_pdf", counting_extract_text_from_pdf)
+
+    pdf = make_pdf("Receipt DOC-1")
+    assert _extract(client, "receipt.pdf", pdf)["call"] == 1
+    assert _extract(client, "receipt.pdf", pdf)["call"] == 1
+    assert mistral.chat_calls == 1
+    assert len(text_extractions) == 1
+
+    # One entry, holding only what the response is built from
+    [key] = list(llm_cache_store)
+    assert llm_cache_store[key] == {"extracted_data": {"document": "DOC-1", "call": 1}, "extraction_method": "text-only"}
+
+def test_no_cache_extracts_again(client, mistral):
+    pdf = make_pdf("Receipt DOC-1")
+    assert _extract(client, "receipt.pdf", pdf)["call"] == 1
+    response = client.post("/extract?no_cache=true", files={"file": ("receipt.pdf", pdf, "application/pdf")}, data={"doc_type": "receipt"})
+    assert response.json()["data"]["call"] == 2
+
+def test_scanned_documents_with_the_same_text_get_their_own_results(client, simple_api, mistral, llm_cache_store):
+    # Both pages extract to the same blank text; Pixtral reads them from the page image
+    simple_api.extractor.model = "pixtral"
+    first, second = make_pdf(shapes=1), make_pdf(shapes=2)
+    assert simple_api.extract_text_from_pdf(first) == simple_api.extract_text_from_pdf(second)
+
+    assert _extract(client, "scan1.pdf", first, "invoice")["call"] == 1
+    assert _extract(client, "scan2.pdf", second, "invoice")["call"] == 2
+    assert len(llm_cache_store) == 2
+
+    assert _extract(client, "scan1.pdf", first, "invoice")["call"] == 1
+    assert _extract(client, "scan2.pdf", second, "invoice")["call"] == 2
+    assert mistral.chat_calls == 2
+
+def test_fallback_results_are_not_cached(client, simple_api, mistral, llm_cache_store):
+    pdf = make_pdf("Receipt DOC-1")
+    mistral.available = False
+    data = _extract(client, "receipt.pdf", pdf)
+    assert data["merchant_name"] == _DUMMY_RECEIPT["merchant_name"]
+    assert len(llm_cache_store) == 0
+
+    # Once the API is back, the same file gets a real extraction
+    mistral.available = True
+    assert _extract(client, "receipt.pdf", pdf) == {"extraction_method": "text-only", "document_type": "receipt", "document": "DOC-1", "call": 1}
+    assert len(llm_cache_store) == 1
+
+def test_unreadable_documents_are_not_cached(client, simple_api, mistral, llm_cache_store):
+    _extract(client, "broken.pdf", b"%PDF-1.4 DOC-1 not really a PDF")
+    assert mistral.chat_calls == 1
+    assert len(llm_cache_store) == 0
+
+def test_text_extraction_failed():
+    from src.simple_api import text_extraction_failed
+
+    assert text_extraction_failed("Error processing PDF document: cannot open broken document")
+    assert text_extraction_failed("Page one\n[Error extracting page 2]\nPage three\n")
+    assert not text_extraction_failed("Invoice DOC-1\nError processing PDF document: quoted in the text\n")
@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+from utils import ai_extractor
+from utils.ai_extractor import AIExtractor, _RunStartPattern, _is_plain_ascii
+
+# The line item patterns as they were written before the run-start and RE2 rewrites
+_DESCRIPTION = r"([A-Za-z0-9\s\-\'\"\/\.,&]+)"
+_REFERENCE_LINE_ITEM_RE = re.compile(_DESCRIPTION + ai_extractor._LINE_ITEM_REST, re.IGNORECASE)
+_REFERENCE_LINE_ITEM_PIPE_RE = re.compile(_DESCRIPTION + ai_extractor._LINE_ITEM_PIPE_REST, re.IGNORECASE)
+
+TEXTS = [
+    "Widget A 2 $10.00 $20.00\nGadget B 1 $5.00 $5.00",
+    # No-break spaces, as PDF text extraction often produces
+    "Widget A\xa02\xa0$10.00 $20.00\nGadget B\xa01\xa0$5.00 $5.00",
+    # Other Unicode whitespace: em space, narrow no-break space, ideographic space
+    "Widget A 2 $10.00　$20.00",
+    # \x1c-\x1f are whitespace to Unicode \s only
+    "Widget A\x1f2\x1e$10.00\x1d$20.00",
+    # Arabic-Indic and full-width digits are \d to Unicode re
+    "Widget A ٢ $١٠.00 $20.00",
+    "Widget A ２ $10.00 $20.00",
+    "Service fee | 1 | $99.00 | $99.00\nSupport\xa0| 2 |\xa0$10.00 | $20.00",
+    "Caf\xe9 au lait 3 $4.50 $13.50",
+    "  Item\vone 1 $1.00 $1.00\n\n",
+    "",
+]
+
+def _select(plain_ascii_pattern, unicode_pattern, text):
+    return (plain_ascii_pattern if _is_plain_ascii(text) else unicode_pattern).findall(text)
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_line_item_patterns_match_reference(text):
+    assert _select(ai_extractor._LINE_ITEM_RE_ASCII, ai_extractor._LINE_ITEM_RE, text) == _REFERENCE_LINE_ITEM_RE.findall(text)
+    assert _select(ai_extractor._LINE_ITEM_PIPE_RE_ASCII, ai_extractor._LINE_ITEM_PIPE_RE, text) == _REFERENCE_LINE_ITEM_PIPE_RE.findall(text)
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_run_start_pattern_matches_re_findall(text):
+    pattern = _RunStartPattern(r"[A-Za-z0-9\s]", r"\s+(\d+)\s+\$?([\d,]+\.\d{2})")
+    assert pattern.findall(text) == re.findall(r"([A-Za-z0-9\s]+)\s+(\d+)\s+\$?([\d,]+\.\d{2})", text)
+
+def test_line_items_separated_by_no_break_spaces_are_extracted():
+    result = AIExtractor._invoice_regex_result("Widget A\xa02\xa0$10.00 $20.00\nGadget B\xa01\xa0$5.00 $5.00")
+    assert result["line_items"] == [
+        {"description": "Widget A", "quantity": "2", "unit_price": "10.00", "amount": "20.00"},
+        {"description": "Gadget B", "quantity": "1", "unit_price": "5.00", "amount": "5.00"},
+    ]
+
+def test_non_ascii_digits_are_matched_like_re():
+    text = "Widget A ٢ $١٠.00 $20.00"
+    assert AIExtractor._invoice_regex_result(text)["line_items"] == [
+        {"description": "Widget A", "quantity": "٢", "unit_price": "١٠.00", "amount": "20.00"},
+    ]
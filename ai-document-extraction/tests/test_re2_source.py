@@ -0,0 +1,112 @@
+import os
+import random
+import re
+
+import pytest
+
+from utils import ai_extractor
+from utils.ai_extractor import AIExtractor, _is_plain_ascii, _re2_source
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_documents")
+
+# Every re pattern that has an RE2 (or re.ASCII) copy for plain ASCII text, with that copy
+PATTERN_PAIRS = [
+    (pattern, ascii_pattern)
+    for table, ascii_table in (
+        (ai_extractor._INVOICE_FIELD_PATTERNS, ai_extractor._INVOICE_FIELD_PATTERNS_ASCII),
+        (ai_extractor._INVOICE_REGEX_PATTERNS, ai_extractor._INVOICE_REGEX_PATTERNS_ASCII),
+    )
+    for field in table
+    for pattern, ascii_pattern in zip(table[field], ascii_table[field])
+] + [
+    (ai_extractor._CONTEXT_DATE_RE, ai_extractor._CONTEXT_DATE_RE_ASCII),
+    (ai_extractor._CONTEXT_COMPANY_RE, ai_extractor._CONTEXT_COMPANY_RE_ASCII),
+]
+
+# Pieces of invoice text, including the separators RE2 and re treat differently
+_FRAGMENTS = [
+    "Invoice", "INV-2023-0042", "invoice # ", "Date:", "Due Date: ", "Issue date ", "January 5, 2024",
+    "12/31/2023", "Total", "TOTAL DUE:", "Subtotal: ", "Tax (10%): ", "VAT rate 20%", "$", "1,234.56",
+    "99.00", "Payment Terms: Net 30", "BILL TO:", "From: ", "ACME CORPORATION, INC.", "Tech Solutions Inc.",
+    "Widget LLC", "==== ", "----", "P.O. # ", "Account Number: ", "12-34", "EIN: 98-7654321", "Address: ",
+    "1 Main St", " ", "  ", "\n", "\r\n", "\t", "\v", "\f", ":", ".", ",", "|", "&", "-", "x", "Q",
+]
+
+def _fuzz_texts(count, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 25))) for _ in range(count)]
+
+def _sample_texts():
+    texts = []
+    for name in sorted(os.listdir(SAMPLE_DIR)):
+        with open(os.path.join(SAMPLE_DIR, name), encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+ASCII_TEXTS = [
+    text
+    for sample in _sample_texts()
+    for text in (sample, sample.rstrip("\n"), sample.rstrip("\n") + "\n", sample.replace("\n", "\r\n"), sample.replace(" ", "\v"))
+    if _is_plain_ascii(text)
+] + _fuzz_texts(300)
+
+# Text _is_plain_ascii rejects, where RE2's ASCII-only \s and \d would match differently
+NON_ASCII_TEXTS = [
+    "Invoice Date:\xa0January\xa05, 2024\nTotal:\xa0$1,234.56\nFrom:\xa0Acme\xa0Corp\n",
+    "Invoice # INV-2023-0042\nDue Date: December 15, 2023",
+    "Total: ١,٢٣٤.٥٦\nTax (10%):\x1c$12.00",
+    "Caf\xe9 Supplies Ltd\nInvoice Date: 01/02/2024\nBILL TO: Jos\xe9 P\xe9rez\n",
+] + [text.replace(" ", "\xa0") for text in _fuzz_texts(100, seed=1) if " " in text]
+
+@pytest.mark.parametrize("pattern, expected", [
+    (re.compile(r"a\sb"), r"a[[:space:]]b"),
+    (re.compile(r"[\s,]+"), r"[[:space:],]+"),
+    (re.compile(r"[^\s]"), r"[^[:space:]]"),
+    (re.compile(r"[]\s]"), r"[][:space:]]"),
+    (re.compile(r"\\s"), r"\\s"),
+    (re.compile(r"x$"), r"x(?:\n?\z)"),
+    (re.compile(r"[$]x\$"), r"[$]x\$"),
+    (re.compile(r"^x$", re.MULTILINE), r"(?m)^x$"),
+    (re.compile(r"x\s*$", re.IGNORECASE), r"(?i)x[[:space:]]*(?:\n?\z)"),
+    (re.compile(r"^x$", re.IGNORECASE | re.MULTILINE), r"(?im)^x$"),
+])
+def test_re2_source_translation(pattern, expected):
+    assert _re2_source(pattern) == expected
+
+def test_ascii_texts_are_plain_ascii():
+    assert len(ASCII_TEXTS) > 300
+    assert not any(_is_plain_ascii(text) for text in NON_ASCII_TEXTS)
+
+@pytest.mark.parametrize("pattern, ascii_pattern", PATTERN_PAIRS, ids=lambda p: getattr(p, "pattern", None))
+def test_ascii_copies_match_re_on_plain_ascii_text(pattern, ascii_pattern):
+    for text in ASCII_TEXTS:
+        assert ascii_pattern.findall(text) == pattern.findall(text), text
+
+@pytest.mark.parametrize("pattern", [pattern for pattern, _ in PATTERN_PAIRS], ids=lambda p: p.pattern)
+def test_re2_translation_matches_re_on_plain_ascii_text(pattern):
+    re2 = pytest.importorskip("re2")
+    translated = re2.compile(_re2_source(pattern))
+    for text in ASCII_TEXTS:
+        assert translated.findall(text) == pattern.findall(text), text
+        match, expected = translated.search(text), pattern.search(text)
+        assert (match and match.span()) == (expected and expected.span()), text
+
+def _reference_invoice_fields(text):
+    """extract_invoice_fields as it would run with only the Unicode re patterns"""
+    fields = {}
+    for field, patterns in ai_extractor._INVOICE_FIELD_PATTERNS.items():
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                fields[field] = (match.group(0) if field == "invoice_number" else match.group(1)).strip()
+                break
+    return fields
+
+@pytest.mark.parametrize("text", ASCII_TEXTS[:20] + NON_ASCII_TEXTS, ids=lambda text: f"{len(text)}chars")
+def test_extract_invoice_fields_matches_re(text):
+    assert AIExtractor.__new__(AIExtractor).extract_invoice_fields(text) == _reference_invoice_fields(text)
+
+def test_no_break_spaces_are_matched_as_whitespace():
+    fields = AIExtractor.__new__(AIExtractor).extract_invoice_fields(NON_ASCII_TEXTS[0])
+    assert fields["invoice_date"] == "January\xa05, 2024"
+    assert fields["total_amount"] == "1,234.56"
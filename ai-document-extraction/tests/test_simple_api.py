@@ -0,0 +1,130 @@
+import os
+import time
+import asyncio
+import threading
+
+from conftest import make_extractor, make_pdf
+
+def _files(*names):
+    """Multipart uploads, one receipt PDF per name, each marked DOC-<position>"""
+    return [("files", (name, make_pdf(f"Receipt DOC-{i}"), "application/pdf")) for i, name in enumerate(names, 1)]
+
+def _wait_for_job(client, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/extract/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish: {job}")
+
+def test_extraction_job_completes_with_result(client, mistral):
+    response = client.post(
+        "/extract/jobs",
+        files={"file": ("receipt.pdf", make_pdf("Receipt DOC-7"), "application/pdf")},
+        data={"doc_type": "receipt"}
+    )
+    assert response.status_code == 200
+    created = response.json()
+    assert created["status"] == "pending"
+
+    job = _wait_for_job(client, created["job_id"])
+    assert job["status"] == "completed"
+    assert job["filename"] == "receipt.pdf"
+    assert job["document_type"] == "receipt"
+    assert job["result"]["success"] is True
+    assert job["result"]["data"]["document"] == "DOC-7"
+    assert "task" not in job
+
+def test_extraction_job_records_failure(client, simple_api, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("extraction exploded")
+    monkeypatch.setattr(simple_api, "extract_text_from_pdf", fail)
+
+    job_id = client.post("/extract/jobs", files={"file": ("receipt.pdf", make_pdf(), "application/pdf")}).json()["job_id"]
+    job = _wait_for_job(client, job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "extraction exploded"
+
+def test_unknown_extraction_job_is_404(client):
+    assert client.get("/extract/jobs/does-not-exist").status_code == 404
+
+def _create_job(client, i):
+    return client.post("/extract/jobs", files={"file": ("receipt.pdf", make_pdf(f"Receipt DOC-{i}"), "application/pdf")})
+
+def test_finished_extraction_jobs_make_room(client, simple_api, monkeypatch):
+    monkeypatch.setattr(simple_api, "MAX_EXTRACTION_JOBS", 2)
+    job_ids = [_create_job(client, i).json()["job_id"] for i in range(2)]
+    for job_id in job_ids:
+        _wait_for_job(client, job_id)
+
+    third = _create_job(client, 2).json()["job_id"]
+    assert client.get(f"/extract/jobs/{job_ids[0]}").status_code == 404
+    assert _wait_for_job(client, job_ids[1])["status"] == "completed"
+    assert _wait_for_job(client, third)["result"]["data"]["document"] == "DOC-2"
+
+def test_in_flight_extraction_jobs_are_kept(client, simple_api, monkeypatch, tmp_path):
+    release = threading.Event()
+    async def blocked_extraction(file_path, *args):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        simple_api.discard_upload(file_path)
+        return {"success": True}
+    monkeypatch.setattr(simple_api, "run_extraction", blocked_extraction)
+    monkeypatch.setattr(simple_api, "MAX_EXTRACTION_JOBS", 2)
+
+    job_ids = [_create_job(client, i).json()["job_id"] for i in range(2)]
+    response = _create_job(client, 2)
+    assert response.status_code == 503
+    # The rejected upload is not left behind
+    assert len([name for name in os.listdir(tmp_path / "uploads") if name.endswith(".pdf")]) == 2
+
+    release.set()
+    assert [_wait_for_job(client, job_id)["status"] for job_id in job_ids] == ["completed", "completed"]
+    assert _create_job(client, 3).status_code == 200
+
+def test_extract_batch_returns_results_in_upload_order(client, simple_api, monkeypatch):
+    save_upload = simple_api.save_upload
+    async def save_upload_failing_for_broken(file, doc_type):
+        if file.filename == "broken.pdf":
+            raise OSError("disk full")
+        return await save_upload(file, doc_type)
+    monkeypatch.setattr(simple_api, "save_upload", save_upload_failing_for_broken)
+
+    response = client.post("/extract-batch", files=_files("receipt_a.pdf", "broken.pdf", "receipt_c.pdf"))
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["filename"] for result in results] == ["receipt_a.pdf", "broken.pdf", "receipt_c.pdf"]
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[0]["data"]["document"] == "DOC-1"
+    assert results[0]["document_type"] == "receipt"
+    assert results[1]["error"] == "disk full"
+    assert results[2]["data"]["document"] == "DOC-3"
+
+def test_extract_bulk_requires_api_key(client, simple_api, monkeypatch):
+    monkeypatch.setattr(simple_api, "extractor", make_extractor(api_key=None))
+    assert client.post("/extract-bulk", files=_files("receipt_a.pdf")).status_code == 503
+
+def test_extract_bulk_submits_one_batch_and_labels_results(client, mistral):
+    response = client.post("/extract-bulk", files=_files("receipt_a.pdf", "invoice_b.pdf"))
+    assert response.status_code == 200
+    assert response.json() == {"batch_id": "batch-1", "file_count": 2}
+    assert len(mistral.batch_requests) == 2
+    assert all("model" not in request["body"] for request in mistral.batch_requests)
+
+    mistral.batch_status = "RUNNING"
+    assert client.get("/extract-bulk/batch-1").json() == {"batch_id": "batch-1", "status": "RUNNING"}
+
+    mistral.batch_status = "SUCCESS"
+    batch = client.get("/extract-bulk/batch-1").json()
+    assert batch["status"] == "SUCCESS"
+    assert [(result["index"], result["filename"], result["document_type"]) for result in batch["results"]] == [
+        (0, "receipt_a.pdf", "receipt"),
+        (1, "invoice_b.pdf", "invoice"),
+    ]
+    assert [result["data"]["document"] for result in batch["results"]] == ["DOC-1", "DOC-2"]
+    assert all(result["data"]["extraction_method"] == "text-only" for result in batch["results"])
+
+def test_bulk_extraction_status_error_is_502(client, mistral):
+    mistral.available = False
+    assert client.get("/extract-bulk/batch-1").status_code == 502
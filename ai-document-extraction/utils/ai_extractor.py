@@ -3,17 +3,354 @@ import json
 import logging
 import re
 import base64
-from typing import Dict, Any, Optional, Union
+import copy
+import importlib.util
+from functools import lru_cache
+from typing import Dict, Any, Optional, Union, List, Tuple
 import io
 from PIL import Image
 
 import httpx
+try:
+    import re2  # google-re2, linear-time matching for the line item patterns
+except ImportError:
+    re2 = None
+try:
+    from orjson import loads as _json_loads  # several times faster than json for model responses
+except ImportError:
+    _json_loads = json.loads
+try:
+    from pybase64 import b64encode_as_string as _b64encode  # SIMD base64, straight to str
+except ImportError:
+    def _b64encode(data) -> str:
+        return base64.b64encode(data).decode("ascii")
 from config.config import MISTRAL_API_KEY, ANTHROPIC_API_KEY, DEFAULT_AI_MODEL
 
-# Configure logging for detailed output
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Logging is configured by the application importing this module
 logger = logging.getLogger(__name__)
 
+# Regex patterns are compiled once at import rather than looked up in re's cache on every call
+
+def _compile_linear(pattern: re.Pattern):
+    """
+    Compile a copy of a pattern for plain ASCII text (see _is_plain_ascii) with RE2 when it is
+    installed. Patterns built around a long unbounded character class make re backtrack over
+    much of the text for every candidate offset, which is quadratic in the text length; RE2's
+    automaton is linear. RE2's \\s and \\d only match ASCII, so other text keeps the re pattern
+    """
+    if re2 is not None:
+        return re2.compile(_re2_source(pattern))
+    return pattern
+
+# Separators in ASCII that Unicode \s matches and re.ASCII's \s doesn't
+_UNICODE_ONLY_SPACE_RE = re.compile(r'[\x1c-\x1f]')
+
+def _re2_source(pattern: re.Pattern) -> str:
+    """
+    Rewrite an re pattern for RE2 so it matches ASCII text the same way: \\s also covers the
+    vertical tab and, without MULTILINE, $ also matches before a final newline
+    """
+    source = pattern.pattern
+    multiline = pattern.flags & re.MULTILINE
+    out = []
+    in_class = False
+    i = 0
+    while i < len(source):
+        token = source[i:i + 2] if source[i] == "\\" else source[i]
+        if token == "[" and not in_class:
+            # A ] straight after the opening [ or [^ is a literal
+            in_class = True
+            token += "^" if source.startswith("^", i + 1) else ""
+            token += "]" if source.startswith("]", i + len(token)) else ""
+            out.append(token)
+        elif token == "]" and in_class:
+            in_class = False
+            out.append(token)
+        elif token == "\\s":
+            out.append("[:space:]" if in_class else "[[:space:]]")
+        elif token == "$" and not in_class and not multiline:
+            out.append("(?:\\n?\\z)")
+        else:
+            out.append(token)
+        i += len(token)
+    flags = ("i" if pattern.flags & re.IGNORECASE else "") + ("m" if multiline else "")
+    return (f"(?{flags})" if flags else "") + "".join(out)
+
+def _ascii_patterns(table: Dict[str, List[re.Pattern]]) -> Dict[str, List[re.Pattern]]:
+    """
+    Recompile a table of field patterns with re.ASCII, which matches about a third faster.
+    On text that passes _is_plain_ascii the results are the same as the Unicode patterns'
+    """
+    return {
+        field: [re.compile(pattern.pattern, (pattern.flags & ~re.UNICODE) | re.ASCII) for pattern in patterns]
+        for field, patterns in table.items()
+    }
+
+def _re2_ascii_patterns(table: Dict[str, List[re.Pattern]]) -> Dict[str, List[re.Pattern]]:
+    """
+    Like _ascii_patterns, but with RE2 when it is installed. RE2 scans text a pattern doesn't
+    match 2-10x faster, while each match it does find costs more than re's
+    """
+    if re2 is None:
+        return _ascii_patterns(table)
+    return {field: [re2.compile(_re2_source(pattern)) for pattern in patterns] for field, patterns in table.items()}
+
+def _is_plain_ascii(text: str) -> bool:
+    """Whether text can be matched with the _ascii_patterns, _re2_ascii_patterns and other _ASCII patterns"""
+    return text.isascii() and _UNICODE_ONLY_SPACE_RE.search(text) is None
+
+class _RunStartPattern:
+    """
+    Pattern "(<char_class>+)<rest>" whose findall() stays linear on re.
+    Any match starting inside a run of char_class could also have started earlier in the
+    same run, so after the scan position only the first character of each run is tried
+    """
+    
+    def __init__(self, char_class: str, rest: str):
+        pattern = f"({char_class}+){rest}"
+        self._pattern = re.compile(pattern)
+        self._run_start = re.compile(f"(?<!{char_class}){pattern}")
+    
+    def findall(self, text: str) -> List[Tuple[str, ...]]:
+        matches = []
+        pos = 0
+        while True:
+            match = self._pattern.match(text, pos) or self._run_start.search(text, pos + 1)
+            if match is None:
+                return matches
+            matches.append(match.groups())
+            pos = match.end()
+
+def _compile_run_start(char_class: str, rest: str):
+    """
+    Compile "(<char_class>+)<rest>" for plain ASCII text with RE2 when it is installed, else
+    as a _RunStartPattern, which is also what other text is matched with
+    """
+    if re2 is not None:
+        return re2.compile(_re2_source(re.compile(f"({char_class}+){rest}")))
+    return _RunStartPattern(char_class, rest)
+
+# Invoice fields picked out before AI extraction, in order of preference per field
+_INVOICE_FIELD_PATTERNS = {
+    "invoice_number": [
+        re.compile(r'invoice\s*(?:#|number|no)?[:.\s]*\s*(INV[a-zA-Z0-9\-]+|\d+[-\w]*)', re.IGNORECASE),
+        re.compile(r'INV-\d+-\d+', re.IGNORECASE),  # More specific pattern for the invoice we saw
+    ],
+    # Company/supplier name with more patterns specific to the sample invoice
+    "supplier_name": [
+        re.compile(r'(?:==+|--+)\s*([\w\s]+(?:INC|LLC|LTD|CORP|CO)(?:\.)?)\s*(?:==+|--+)', re.IGNORECASE | re.MULTILINE),
+        re.compile(r'^([\w\s]+(?:INC|LLC|LTD|CORP|CO)(?:\.)?)$', re.IGNORECASE | re.MULTILINE),
+        re.compile(r'BILL\s+FROM:?\s*([\w\s\.,&]+)', re.IGNORECASE | re.MULTILINE),
+        re.compile(r'(TECH\s+SOLUTIONS\s+INC\.)', re.IGNORECASE | re.MULTILINE),  # Specific to the sample invoice
+        re.compile(r'(ACME\s+CORPORATION,\s+INC\.)', re.IGNORECASE | re.MULTILINE),  # For ACME invoice
+    ],
+    "invoice_date": [
+        re.compile(r'(?:invoice|issue)\s*date[:.\s]\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4})', re.IGNORECASE),
+        re.compile(r'Date:\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4})', re.IGNORECASE),  # Specific to the sample invoice
+    ],
+    "total_amount": [
+        re.compile(r'(?:total|amount|sum|balance|due)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})', re.IGNORECASE),
+        re.compile(r'(?:TOTAL)[:.\s]+\s*\$\s*([\d,]+\.\d{2})', re.IGNORECASE),  # Specific to invoices with TOTAL: $1,234.56
+    ],
+    "vat_amount": [
+        re.compile(r'(?:vat|tax|gst)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})', re.IGNORECASE),
+        re.compile(r'(?:Tax)\s+\(\d+%\)[:.\s]+\s*\$\s*([\d,]+\.\d{2})', re.IGNORECASE),  # Specific to tax format: Tax (10%): $123.45
+    ],
+    "payment_due_date": [
+        re.compile(r'(?:payment|due)\s*date[:.\s]\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4})', re.IGNORECASE),
+        re.compile(r'Due\s+Date:\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4})', re.IGNORECASE),  # Specific to the sample invoice
+    ],
+}
+_INVOICE_FIELD_PATTERNS_ASCII = _re2_ascii_patterns(_INVOICE_FIELD_PATTERNS)
+
+# Context sections quoted to the AI alongside the pre-extracted invoice fields
+_CONTEXT_INVOICE_NUMBER_RE = re.compile(r'invoice\s*(?:no|number|#)?\s*[\:\.\-\s]?\s*([A-Za-z0-9\-]+)', re.IGNORECASE)
+_CONTEXT_DATE_RE = re.compile(r'(?:invoice|due|issue|date)(?:\s*date)?[\:\.\-\s]?\s*([A-Za-z0-9\-\,\s]+\d{4})', re.IGNORECASE)
+_CONTEXT_DATE_RE_ASCII = _compile_linear(_CONTEXT_DATE_RE)
+_CONTEXT_AMOUNT_RE = re.compile(r'(?:total|amount|sum|balance|due)[\:\.\-\s]?\s*\$?\s*[\d\,\.]+', re.IGNORECASE)
+_CONTEXT_COMPANY_RE = re.compile(r'(?:from|vendor|supplier|bill from|sold by|company)[\:\.\-\s]?\s*([A-Za-z0-9\-\,\s\.]+)(?:\n|$)', re.IGNORECASE)
+_CONTEXT_COMPANY_RE_ASCII = _compile_linear(_CONTEXT_COMPANY_RE)
+
+# Common regex patterns for invoice fields used by the regex-only extraction
+_INVOICE_REGEX_PATTERNS = {
+    "invoice_number": [
+        re.compile(r"invoice\s*(?:#|number|no)?[:.\s]*\s*(INV[a-zA-Z0-9\-]+|\d+[-\w]*)", re.IGNORECASE),
+        re.compile(r"(?:INV|INVOICE)[:\-\s]*(\d+(?:[-\/]\d+)*)", re.IGNORECASE)
+    ],
+    "supplier_name": [
+        re.compile(r"(?:==+|--+)\s*([\w\s]+(?:INC|LLC|LTD|CORP|CO)(?:\.)?)\s*(?:==+|--+)", re.IGNORECASE),
+        re.compile(r"(ACME\s+CORPORATION,\s+INC\.)", re.IGNORECASE),
+        re.compile(r"(TECH\s+SOLUTIONS\s+INC\.)", re.IGNORECASE),
+        re.compile(r"^([A-Z\s]+(?:INC|LLC|LTD|CORP|CO)(?:\.|,)?\s*(?:INC|LLC|LTD|CORP|CO)?\.?)$", re.IGNORECASE),
+        re.compile(r"FROM:?\s*([\w\s\.,&]+)(?:\r|\n|$)", re.IGNORECASE)
+    ],
+    "invoice_date": [
+        re.compile(r"(?:invoice|issue)\s*date[:.\s]\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4})", re.IGNORECASE),
+        re.compile(r"Date:\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE),
+        re.compile(r"DATE(?:\s+)?:(?:\s+)?([A-Z][a-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE)
+    ],
+    "total_amount": [
+        re.compile(r"(?:total|amount|sum|balance|due)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})", re.IGNORECASE),
+        re.compile(r"(?:TOTAL\s+DUE)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})", re.IGNORECASE),
+        re.compile(r"TOTAL\s+DUE:?\s*\$?([\d,]+\.\d{2})", re.IGNORECASE)
+    ],
+    "subtotal_amount": [
+        re.compile(r"(?:subtotal|sub-total|sub total)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})", re.IGNORECASE),
+        re.compile(r"Subtotal:?\s*\$?([\d,]+\.\d{2})", re.IGNORECASE)
+    ],
+    "vat_amount": [
+        re.compile(r"(?:vat|tax|gst|hst)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})", re.IGNORECASE),
+        re.compile(r"(?:Tax)\s+\(\d+(?:\.\d+)?%\)[:.\s]+\s*\$\s*([\d,]+\.\d{2})", re.IGNORECASE),
+        re.compile(r"Tax\s+\((\d+(?:\.\d+)?)%\)[:.\s]+\s*\$\s*[\d,]+\.\d{2}", re.IGNORECASE)
+    ],
+    "tax_rate": [
+        re.compile(r"(?:Tax|VAT)\s+\((\d+(?:\.\d+)?)%\)", re.IGNORECASE),
+        re.compile(r"(?:Tax|VAT) rate:?\s*(\d+(?:\.\d+)?)%", re.IGNORECASE)
+    ],
+    "payment_due_date": [
+        re.compile(r"(?:payment|due)\s*date[:.\s]\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4})", re.IGNORECASE),
+        re.compile(r"Due\s+Date:\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE)
+    ],
+    "payment_terms": [
+        re.compile(r"(?:payment\s+terms|terms):?\s*(Net\s+\d+|Due on Receipt|[^\r\n,]+)", re.IGNORECASE),
+        re.compile(r"Payment\s+Terms:?\s*(Net\s+\d+)", re.IGNORECASE),
+        re.compile(r"Terms:?\s*(Net\s+\d+)", re.IGNORECASE)
+    ],
+    "client_name": [
+        re.compile(r"(?:BILL\s+TO|SOLD\s+TO|CUSTOMER|CLIENT)[:.\s]*\s*(?:Name)?[:.\s]*\s*([A-Za-z0-9\s\.,&]+)(?:\r|\n|$)", re.IGNORECASE),
+        re.compile(r"Client\s+Name:?\s*([^\r\n]+)", re.IGNORECASE)
+    ],
+    "client_address": [
+        re.compile(r"(?:BILL\s+TO|SOLD\s+TO):?(?:.*\r?\n){1}((?:.*\r?\n){1,4})", re.IGNORECASE),
+        re.compile(r"Address:?\s*([^\r\n]+(?:\r?\n[^\r\n]+){0,3})", re.IGNORECASE)
+    ],
+    "purchase_order": [
+        re.compile(r"(?:P\.?O\.?|Purchase\s+Order)(?:\s+#|\s+No\.?|\s+Number)?:?\s*([A-Za-z0-9\-]+)", re.IGNORECASE)
+    ],
+    "account_number": [
+        re.compile(r"(?:Account|Customer|Client)(?:\s+#|\s+No\.?|\s+Number)?:?\s*([A-Za-z0-9\-]+)", re.IGNORECASE),
+        re.compile(r"Account\s+Number:?\s*(\d+(?:-\d+)*)", re.IGNORECASE)
+    ],
+    "tax_id": [
+        re.compile(r"(?:Tax|VAT)\s+(?:ID|Number):?\s*([A-Za-z0-9\-]+)", re.IGNORECASE),
+        re.compile(r"(?:EIN|FEIN|Federal ID):?\s*([A-Za-z0-9\-]+)", re.IGNORECASE)
+    ]
+}
+_INVOICE_REGEX_PATTERNS_ASCII = _re2_ascii_patterns(_INVOICE_REGEX_PATTERNS)
+
+# Literals every pattern of a field needs one of; a field whose keywords are all absent from
+# the lowercased text can't match, so its patterns are skipped
+_INVOICE_REGEX_KEYWORDS = {
+    "invoice_number": ("inv",),
+    "supplier_name": ("inc", "llc", "ltd", "co", "from"),
+    "invoice_date": ("date",),
+    "total_amount": ("total", "amount", "sum", "balance", "due"),
+    "subtotal_amount": ("subtotal", "sub-total", "sub total"),
+    "vat_amount": ("vat", "tax", "gst", "hst"),
+    "tax_rate": ("tax", "vat"),
+    "payment_due_date": ("date",),
+    "payment_terms": ("terms",),
+    "client_name": ("bill", "sold", "customer", "client"),
+    "client_address": ("bill", "sold", "address"),
+    "purchase_order": ("po", "p.o", "purchase"),
+    "account_number": ("account", "customer", "client"),
+    "tax_id": ("tax", "vat", "ein", "federal id")
+}
+
+# Line items in tabular formats, with and without pipe separators. They are matched without
+# re.IGNORECASE (about 3.5x faster) since the description class spells out both cases; the
+# non-ASCII letters IGNORECASE also folds into A-Za-z (İ ı ſ and the Kelvin sign) are listed.
+# Both scans are linear and take well under a millisecond on the text sent for extraction,
+# so a JIT-compiled scanner wouldn't be worth the extra dependency
+_LINE_ITEM_DESCRIPTION_CHARS = r"[A-Za-z0-9\s\-\'\"\/\.,&" + "\u0130\u0131\u017f\u212a]"
+_LINE_ITEM_PIPE_REST = r"\s+\|\s*(\d+)\s+\|\s*\$?([\d,]+\.\d{2})\s+\|\s*\$?([\d,]+\.\d{2})"
+_LINE_ITEM_REST = r"\s+(\d+)\s+\$?([\d,]+\.\d{2})\s+\$?([\d,]+\.\d{2})"
+_LINE_ITEM_PIPE_RE = _RunStartPattern(_LINE_ITEM_DESCRIPTION_CHARS, _LINE_ITEM_PIPE_REST)
+_LINE_ITEM_PIPE_RE_ASCII = _compile_run_start(_LINE_ITEM_DESCRIPTION_CHARS, _LINE_ITEM_PIPE_REST)
+_LINE_ITEM_RE = _RunStartPattern(_LINE_ITEM_DESCRIPTION_CHARS, _LINE_ITEM_REST)
+_LINE_ITEM_RE_ASCII = _compile_run_start(_LINE_ITEM_DESCRIPTION_CHARS, _LINE_ITEM_REST)
+_CURRENCY_RE = re.compile(r"(?:amount|total|price).*?([$€£¥])", re.IGNORECASE)
+
+# Table rule characters and runs of spaces stripped from line item descriptions
+_RULE_CHARS_RE = re.compile(r'[-_=]{3,}')
+_REPEATED_SPACE_RE = re.compile(r'\s{2,}')
+
+@lru_cache(maxsize=None)
+def _http_client() -> httpx.Client:
+    """
+    Shared HTTP client for the Mistral API. Its connection pool keeps connections alive
+    between requests, so each extraction reuses an open TLS connection instead of doing
+    a fresh handshake. With the h2 package installed it speaks HTTP/2, so concurrent
+    extractions share one connection.
+    """
+    return httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+    )
+
+def close_http_client():
+    """Close the shared HTTP client's pooled connections (call on application shutdown)"""
+    if _http_client.cache_info().currsize:
+        _http_client().close()
+        _http_client.cache_clear()
+
+# System messages only depend on the document type, so each is built once per type
+@lru_cache(maxsize=None)
+def _pixtral_system_message(document_type: str) -> str:
+    """System message for multimodal extraction, with special emphasis on tables"""
+    return f"""You are an expert document analysis system specialized in extracting structured information from {document_type}s. 
+Extract all relevant information including line items, amounts, dates, and entities.
+
+IMPORTANT: When extracting tables from documents:
+1. Identify tabular structures visually, even if text extraction breaks the alignment
+2. Correctly separate column headers from content
+3. Process each table row as a distinct item with properly structured fields
+4. Never include table borders, lines, or formatting characters in the extracted content
+5. Pay special attention to alignment of data across columns"""
+
+@lru_cache(maxsize=None)
+def _mistral_system_message(document_type: str) -> str:
+    """System message for text-only extraction"""
+    return f"You are an expert document analysis system specialized in extracting structured information from {document_type}s. Extract all relevant information from the provided document and return a complete JSON object with all fields."
+
+# Images sent to the multimodal model are downscaled so their longest side fits this limit,
+# and JPEGs under the size limit are sent without re-encoding
+_MAX_IMAGE_SIDE = 1600
+_JPEG_QUALITY = 85
+_JPEG_PASSTHROUGH_BYTES = 500_000
+
+def _redact_images(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy chat messages for logging with each base64 image replaced by its size"""
+    redacted = []
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, list):
+            content = [
+                {**part, "image_url": {"url": f"<{len(part['image_url']['url'])} bytes of image data>"}}
+                if part.get("type") == "image_url" else part
+                for part in content
+            ]
+        redacted.append({**message, "content": content})
+    return redacted
+
+# Placeholder results returned when extraction fails completely; copied per call since
+# callers modify them
+_DUMMY_INVOICE = {
+    "invoice_number": "INV-2023-0001",
+    "supplier_name": "ACME Corporation",
+    "invoice_date": "January 1, 2023",
+    "total_amount": "100.00",
+    "vat_amount": "20.00",
+    "payment_due_date": "January 30, 2023"
+}
+_DUMMY_RECEIPT = {
+    "merchant_name": "Local Store",
+    "date": "January 1, 2023",
+    "total_amount": "75.50",
+    "items": ["Item 1 - $25.00", "Item 2 - $50.50"],
+    "payment_method": "Credit Card"
+}
+
 class AIExtractor:
     def __init__(self, model: str = None):
         self.mistral_api_key = MISTRAL_API_KEY
@@ -36,89 +373,19 @@ class AIExtractor:
     
     def extract_invoice_fields(self, text: str) -> Dict[str, str]:
         """Extract key invoice fields directly using regex patterns."""
-        logger.debug(f"Attempting regex extraction on text of length {len(text)}")
+        logger.debug("Attempting regex extraction on text of length %d", len(text))
         fields = {}
         
-        # Extract invoice number
-        invoice_patterns = [
-            r'(?i)invoice\s*(?:#|number|no)?[:.\s]*\s*(INV[a-zA-Z0-9\-]+|\d+[-\w]*)',
-            r'(?i)INV-\d+-\d+',  # More specific pattern for the invoice we saw
-        ]
-        
-        for pattern in invoice_patterns:
-            invoice_match = re.search(pattern, text)
-            if invoice_match:
-                fields["invoice_number"] = invoice_match.group(1).strip() if pattern.endswith('*') else invoice_match.group(0).strip()
-                logger.debug(f"Found invoice number: {fields['invoice_number']} using pattern: {pattern}")
-                break
-        
-        # Extract company/supplier name with more patterns specific to the sample invoice
-        company_patterns = [
-            r'(?i)(?:==+|--+)\s*([\w\s]+(?:INC|LLC|LTD|CORP|CO)(?:\.)?)\s*(?:==+|--+)',
-            r'(?i)^([\w\s]+(?:INC|LLC|LTD|CORP|CO)(?:\.)?)$',
-            r'(?i)BILL\s+FROM:?\s*([\w\s\.,&]+)',
-            r'(?i)(TECH\s+SOLUTIONS\s+INC\.)',  # Specific to the sample invoice
-            r'(?i)(ACME\s+CORPORATION,\s+INC\.)', # For ACME invoice
-        ]
-        
-        for pattern in company_patterns:
-            company_match = re.search(pattern, text, re.MULTILINE)
-            if company_match:
-                fields["supplier_name"] = company_match.group(1).strip()
-                logger.debug(f"Found supplier name: {fields['supplier_name']} using pattern: {pattern}")
-                break
-        
-        # Extract invoice date with more patterns
-        date_patterns = [
-            r'(?i)(?:invoice|issue)\s*date[:.\s]\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'(?i)Date:\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4})',  # Specific to the sample invoice
-        ]
-        
-        for pattern in date_patterns:
-            date_match = re.search(pattern, text)
-            if date_match:
-                fields["invoice_date"] = date_match.group(1).strip()
-                logger.debug(f"Found invoice date: {fields['invoice_date']} using pattern: {pattern}")
-                break
-        
-        # Extract total amount with more patterns
-        amount_patterns = [
-            r'(?i)(?:total|amount|sum|balance|due)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})',
-            r'(?i)(?:TOTAL)[:.\s]+\s*\$\s*([\d,]+\.\d{2})',  # Specific to invoices with TOTAL: $1,234.56
-        ]
-        
-        for pattern in amount_patterns:
-            amount_match = re.search(pattern, text)
-            if amount_match:
-                fields["total_amount"] = amount_match.group(1).strip()
-                logger.debug(f"Found total amount: {fields['total_amount']} using pattern: {pattern}")
-                break
-        
-        # Extract VAT/tax amount
-        vat_patterns = [
-            r'(?i)(?:vat|tax|gst)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})',
-            r'(?i)(?:Tax)\s+\(\d+%\)[:.\s]+\s*\$\s*([\d,]+\.\d{2})',  # Specific to tax format: Tax (10%): $123.45
-        ]
-        
-        for pattern in vat_patterns:
-            vat_match = re.search(pattern, text)
-            if vat_match:
-                fields["vat_amount"] = vat_match.group(1).strip()
-                logger.debug(f"Found VAT amount: {fields['vat_amount']} using pattern: {pattern}")
-                break
-        
-        # Extract payment due date with more patterns
-        due_patterns = [
-            r'(?i)(?:payment|due)\s*date[:.\s]\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'(?i)Due\s+Date:\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4})',  # Specific to the sample invoice
-        ]
-        
-        for pattern in due_patterns:
-            due_match = re.search(pattern, text)
-            if due_match:
-                fields["payment_due_date"] = due_match.group(1).strip()
-                logger.debug(f"Found payment due date: {fields['payment_due_date']} using pattern: {pattern}")
-                break
+        # Use the first pattern that matches for each field
+        table = _INVOICE_FIELD_PATTERNS_ASCII if _is_plain_ascii(text) else _INVOICE_FIELD_PATTERNS
+        for field, patterns in table.items():
+            for pattern in patterns:
+                match = pattern.search(text)
+                if match:
+                    # Invoice numbers keep the whole match, label included
+                    fields[field] = (match.group(0) if field == "invoice_number" else match.group(1)).strip()
+                    logger.debug("Found %s: %s using pattern: %s", field, fields[field], pattern.pattern)
+                    break
         
         logger.info(f"Regex extraction results: {fields}")
         return fields
@@ -128,14 +395,18 @@ class AIExtractor:
         Preprocess text to optimize for extraction.
         Focus on the most important sections based on document type.
         """
-        logger.debug(f"Preprocessing text for {document_type}, text length: {len(text)}")
+        logger.debug("Preprocessing text for %s, text length: %d", document_type, len(text))
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = " ".join(text.split())
+        text_length = len(text)
         
         # Direct field extraction for invoice PDFs
         if document_type == 'invoice':
-            # Try to extract fields directly with regex first
+            plain_ascii = _is_plain_ascii(text)
+            # Try to extract fields directly with regex first. This uses its own pattern table on
+            # the whitespace-collapsed text, so the _extract_invoice_with_regex result extract_data
+            # already has can't stand in for it
             extracted_fields = self.extract_invoice_fields(text)
             
             # If we found direct fields, create a special section with them
@@ -147,37 +418,41 @@ class AIExtractor:
                 important_sections = []
                 
                 # Look for invoice number
-                invoice_match = re.search(r'(?i)invoice\s*(?:no|number|#)?\s*[\:\.\-\s]?\s*([A-Za-z0-9\-]+)', text)
+                invoice_match = _CONTEXT_INVOICE_NUMBER_RE.search(text)
                 if invoice_match:
                     important_sections.append(invoice_match.group(0))
                 
                 # Look for date information
-                date_matches = re.findall(r'(?i)(?:invoice|due|issue|date)(?:\s*date)?[\:\.\-\s]?\s*([A-Za-z0-9\-\,\s]+\d{4})', text)
+                date_matches = (_CONTEXT_DATE_RE_ASCII if plain_ascii else _CONTEXT_DATE_RE).findall(text)
                 important_sections.extend(date_matches)
                 
                 # Look for amount information
-                amount_matches = re.findall(r'(?i)(?:total|amount|sum|balance|due)[\:\.\-\s]?\s*\$?\s*[\d\,\.]+', text)
+                amount_matches = _CONTEXT_AMOUNT_RE.findall(text)
                 important_sections.extend(amount_matches)
                 
                 # Look for company/supplier information
-                company_blocks = re.findall(r'(?i)(?:from|vendor|supplier|bill from|sold by|company)[\:\.\-\s]?\s*([A-Za-z0-9\-\,\s\.]+)(?:\n|$)', text)
+                company_blocks = (_CONTEXT_COMPANY_RE_ASCII if plain_ascii else _CONTEXT_COMPANY_RE).findall(text)
                 important_sections.extend(company_blocks)
                 
                 # If we found more context sections, add them too
                 sections_text = "\n".join(important_sections) if important_sections else ""
                 
-                # Take beginning and end parts of the document for context
-                beginning = text[:1000]
-                ending = text[-1000:] if len(text) > 1000 else ""
+                # Take beginning and end parts of the document for context; a short
+                # document is included once rather than as two overlapping slices
+                if text_length <= 2000:
+                    beginning, ending = text, ""
+                else:
+                    beginning, ending = text[:1000], text[-1000:]
                 
+                # The f-string is built in one pass, like a "".join of its parts
                 processed_text = f"{beginning}\n\n--- EXTRACTED FIELDS ---\n{fields_text}\n\n--- RELEVANT SECTIONS ---\n{sections_text}\n\n{ending}"
-                logger.debug(f"Created enhanced document with extracted fields, length: {len(processed_text)}")
+                logger.debug("Created enhanced document with extracted fields, length: %d", len(processed_text))
                 return processed_text
         
         # If direct extraction didn't work or for other document types
         # Use the original approach
-        if len(text) > self.max_tokens:
-            logger.warning(f"Text too long ({len(text)} chars), truncating to {self.max_tokens} chars")
+        if text_length > self.max_tokens:
+            logger.warning(f"Text too long ({text_length} chars), truncating to {self.max_tokens} chars")
             # Take the first 1/3 and last 2/3 of allowed tokens to capture header and total sections
             first_part = int(self.max_tokens * 0.33)
             last_part = self.max_tokens - first_part
@@ -192,22 +467,50 @@ class AIExtractor:
                 logger.error(f"Image path does not exist: {image_path}")
                 raise FileNotFoundError(f"Image file not found: {image_path}")
             
-            logger.debug(f"Encoding image from: {image_path}")
+            logger.debug("Encoding image from: %s", image_path)
             
             # Check file size
-            file_size = os.path.getsize(image_path) / (1024 * 1024)  # Size in MB
+            file_bytes = os.path.getsize(image_path)
+            file_size = file_bytes / (1024 * 1024)  # Size in MB
             if file_size > 20:
                 logger.warning(f"Image file is large ({file_size:.2f} MB), may exceed API limits")
             
             with open(image_path, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode("utf-8")
+                # Small JPEGs go as they are (read() whole, which at under 500KB measures the same
+                # as encoding from an mmap); anything else is decoded straight from the file
+                # (never held in memory whole) and downscaled and re-encoded as JPEG
+                if file_bytes < _JPEG_PASSTHROUGH_BYTES and image_file.read(3) == b"\xff\xd8\xff":
+                    image_file.seek(0)
+                    encoded_string = _b64encode(image_file.read())
+                else:
+                    image_file.seek(0)
+                    with Image.open(image_file) as image:
+                        image.thumbnail((_MAX_IMAGE_SIDE, _MAX_IMAGE_SIDE), Image.LANCZOS)
+                        buffer = io.BytesIO()
+                        image.convert("RGB").save(buffer, "JPEG", quality=_JPEG_QUALITY, optimize=True)
+                    encoded_string = _b64encode(buffer.getbuffer())
             
-            logger.debug(f"Successfully encoded image ({len(encoded_string) / 1024:.2f} KB base64 data)")
+            logger.debug("Successfully encoded image (%.2f KB base64 data)", len(encoded_string) / 1024)
             return encoded_string
         
         except Exception as e:
             logger.error(f"Error encoding image: {str(e)}")
             raise
+    
+    def encode_pdf_page(self, pdf_path: str, page_num: int = 0) -> str:
+        """Render a PDF page straight to base64 JPEG data for API requests, with no temporary image file"""
+        import fitz  # PyMuPDF
+        
+        with fitz.open(pdf_path) as pdf_document:
+            page = pdf_document[page_num]
+            
+            # Render at up to twice the page size, capped so the longest side fits the limit
+            zoom = min(2, _MAX_IMAGE_SIDE / max(page.rect.width, page.rect.height))
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            encoded_string = _b64encode(pix.tobytes("jpeg", jpg_quality=_JPEG_QUALITY))
+        
+        logger.debug("Rendered page %d of %s (%dx%d, %.2f KB base64 data)", page_num + 1, pdf_path, pix.width, pix.height, len(encoded_string) / 1024)
+        return encoded_string
             
     def extract_data(self, document_content: str, document_type: str, image_path: str = None) -> Dict[str, Any]:
         """
@@ -221,32 +524,48 @@ class AIExtractor:
         Returns:
         - Dictionary of extracted fields
         """
+        return self.extract_data_with_status(document_content, document_type, image_path)[0]
+    
+    def extract_data_with_status(self, document_content: str, document_type: str, image_path: str = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Extract structured data like extract_data, also reporting whether the AI model answered.
+        
+        Returns:
+        - Dictionary of extracted fields
+        - True if the fields came from the model; False for regex or placeholder data used
+          when there is no API key or the API call failed, which callers must not cache
+        """
         logger.info(f"Extracting data from {document_type} document using {self.model.capitalize()} AI")
         logger.info(f"Image path provided: {image_path}")
         
+        # Check for the image once; both the multimodal and the fallback choice depend on it
+        image_exists = bool(image_path) and os.path.exists(image_path)
+        
         # Force using multimodal extraction for all PDFs to diagnose issues
         use_multimodal = False
-        if image_path and os.path.exists(image_path):
+        if image_exists:
             # Check if the file is a PDF
             if image_path.lower().endswith('.pdf'):
                 use_multimodal = True
                 logger.info(f"PDF detected for multimodal extraction: {image_path}")
         
-        # Truncate text if too long
-        if len(document_content) > self.max_tokens:
-            logger.warning(f"Text too long ({len(document_content)} chars), truncating to {self.max_tokens:,} chars")
+        # Truncate text if too long; this is the only cut, both backends get the same text
+        text_length = len(document_content)
+        if text_length > self.max_tokens:
+            logger.warning(f"Text too long ({text_length} chars), truncating to {self.max_tokens:,} chars")
             document_content = document_content[:self.max_tokens]
+            text_length = self.max_tokens
         
         # Check if we have valid API keys
         if not self.mistral_api_key:
             logger.warning("No Mistral API key available, using dummy extraction")
-            return self._dummy_extraction(document_type)
+            return self._dummy_extraction(document_type), False
         
         # Prefer multimodal extraction for all documents when image is available
         # This is especially helpful for documents with tables (invoices, receipts, etc.)
         if use_multimodal:
             logger.info(f"Using multimodal extraction for {document_type} to better capture document structure")
-            extracted_data = self._extract_with_pixtral(document_content, document_type, image_path)
+            extracted_data, from_model = self._extract_with_pixtral(document_content, document_type, image_path)
             
             # For invoices, also apply regex augmentation to refine the multimodal extraction
             if document_type == "invoice":
@@ -254,7 +573,7 @@ class AIExtractor:
                 extracted_data = self._augment_multimodal_with_regex(extracted_data, regex_extraction)
                 logger.info("Applied regex augmentation to multimodal extraction")
             
-            return extracted_data
+            return extracted_data, from_model
         
         logger.info(f"Multimodal extraction not available, falling back to text-only extraction")
             
@@ -264,63 +583,41 @@ class AIExtractor:
             # If we got good data from regex, return it (faster and cheaper)
             if self._is_valid_extraction(extracted_data, document_type):
                 logger.info("Successfully extracted invoice data using direct pattern matching")
-                return extracted_data
+                return extracted_data, False
                 
         # If regex failed or not an invoice, use AI extraction
-        logger.info(f"Starting {self.model} extraction for {document_type} document, text length: {len(document_content)}")
-        
-        # Choose extraction method based on model and available data
-        if self.model == "pixtral" and image_path and os.path.exists(image_path):
-            # Use multimodal extraction with both text and image
-            return self._extract_with_pixtral(document_content, document_type, image_path)
-        elif self.model == "mistral":
-            # Use text-only extraction
-            return self._extract_with_mistral(document_content, document_type)
-        else:
-            # Fallback to text-only even with Pixtral if image not available
-            if self.model == "pixtral":
-                return self._extract_with_pixtral(document_content, document_type)
-            else:
-                return self._extract_with_mistral(document_content, document_type)
+        logger.info(f"Starting {self.model} extraction for {document_type} document, text length: {text_length}")
+        
+        # Choose extraction method based on model and available data: Pixtral uses the
+        # image alongside the text when there is one and the text alone otherwise
+        if self.model == "pixtral":
+            return self._extract_with_pixtral(document_content, document_type, image_path if image_exists else None)
+        return self._extract_with_mistral(document_content, document_type)
     
-    def _extract_with_pixtral(self, text: str, document_type: str, image_path: str = None) -> Dict[str, Any]:
-        """Extract data using Pixtral's multimodal capabilities"""
+    def _extract_with_pixtral(self, text: str, document_type: str, image_path: str = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Extract data using Pixtral's multimodal capabilities, falling back to Mistral.
+        Returns the data and whether a model answered, as extract_data_with_status does
+        """
         try:
             prompt = self._generate_extraction_prompt(document_type)
             messages = []
             
             # Create system message for better context with special emphasis on tables
-            system_message = f"""You are an expert document analysis system specialized in extracting structured information from {document_type}s. 
-Extract all relevant information including line items, amounts, dates, and entities.
-
-IMPORTANT: When extracting tables from documents:
-1. Identify tabular structures visually, even if text extraction breaks the alignment
-2. Correctly separate column headers from content
-3. Process each table row as a distinct item with properly structured fields
-4. Never include table borders, lines, or formatting characters in the extracted content
-5. Pay special attention to alignment of data across columns"""
+            system_message = _pixtral_system_message(document_type)
             
             if image_path and os.path.exists(image_path):
                 logger.info(f"Using multimodal extraction with image: {image_path}")
                 
-                # For PDFs, we need to convert first page to image
+                # For PDFs, we need to convert first page to image. Encodings aren't cached by
+                # path: uploads are saved under unique names, so a path never comes back, and
+                # the Mistral fallback after a Pixtral failure sends text only
+                base64_image = None
                 if image_path.lower().endswith('.pdf'):
                     try:
-                        import fitz  # PyMuPDF
-                        temp_image_path = image_path.replace('.pdf', '.jpg')
-                        logger.info(f"Converting first page of PDF to image: {temp_image_path}")
-                        
-                        # Open the PDF and get the first page
-                        pdf_document = fitz.open(image_path)
-                        first_page = pdf_document[0]
-                        
-                        # Render page to an image with high resolution
-                        pix = first_page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                        pix.save(temp_image_path)
-                        
-                        # Use the image for extraction
-                        image_path = temp_image_path
-                        logger.info(f"Successfully converted PDF to image: {image_path}")
+                        logger.info(f"Converting first page of PDF to image: {image_path}")
+                        base64_image = self.encode_pdf_page(image_path)
+                        logger.info("Successfully converted PDF to image")
                     except ImportError:
                         logger.warning("PyMuPDF not installed, attempting to use PDF directly")
                     except Exception as pdf_err:
@@ -328,10 +625,13 @@ IMPORTANT: When extracting tables from documents:
                 
                 # Encode image to base64
                 try:
-                    base64_image = self.encode_image(image_path)
+                    if base64_image is None:
+                        base64_image = self.encode_image(image_path)
                     logger.info("Successfully encoded image to base64")
                     
-                    # Include both text and image in the request
+                    # Include both text and image in the request. The image goes inline as a data URL:
+                    # uploading it to /v1/files for a signed URL would avoid the base64 overhead on a
+                    # small capped JPEG, but adds two round trips per request
                     messages = [
                         {"role": "system", "content": system_message},
                         {"role": "user", "content": [
@@ -355,10 +655,12 @@ IMPORTANT: When extracting tables from documents:
                     {"role": "user", "content": f"\n{prompt}\n\nText extracted from document:\n{text}"}
                 ]
             
-            logger.debug(f"Request messages structure: {str(messages)[:200]}...")
+            # Only build the summary when it will be logged, and leave out the base64 image
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Request messages structure: %.200s...", _redact_images(messages))
             
             # Make API request to Mistral API for Pixtral model
-            response = httpx.post(
+            response = _http_client().post(
                 "https://api.mistral.ai/v1/chat/completions",
                 headers={
                     "Authorization": f"Bearer {self.mistral_api_key}",
@@ -374,28 +676,29 @@ IMPORTANT: When extracting tables from documents:
             )
             
             response.raise_for_status()
-            result = response.json()
+            result = _json_loads(response.content)
             
             # Extract the JSON response
             content = result["choices"][0]["message"]["content"]
-            logger.debug(f"Raw API response content: {content[:200]}...")
+            logger.debug("Raw API response content: %.200s...", content)
             
             try:
-                extracted_data = json.loads(content)
+                extracted_data = _json_loads(content)
                 logger.info("Successfully parsed JSON response from Pixtral")
             except json.JSONDecodeError as json_err:
                 logger.error(f"Error parsing JSON response: {str(json_err)}")
-                logger.debug(f"Invalid JSON content: {content}")
+                logger.debug("Invalid JSON content: %s", content)
                 raise
             
             # Log successful extraction
             logger.info(f"Successfully extracted data from {document_type} document using Pixtral")
             
             # For debugging, log the extracted data summary
-            fields_extracted = list(filter(lambda k: extracted_data.get(k) is not None, extracted_data.keys()))
-            logger.debug(f"Fields successfully extracted: {fields_extracted}")
+            if logger.isEnabledFor(logging.DEBUG):
+                fields_extracted = [field for field, value in extracted_data.items() if value is not None]
+                logger.debug("Fields successfully extracted: %s", fields_extracted)
             
-            return extracted_data
+            return extracted_data, True
             
         except Exception as e:
             logger.error(f"Error in Pixtral extraction: {str(e)}")
@@ -406,56 +709,66 @@ IMPORTANT: When extracting tables from documents:
             except Exception as inner_e:
                 logger.error(f"Mistral fallback also failed: {str(inner_e)}")
                 # As final fallback, try regex extraction
-                return self._extract_invoice_with_regex(text) if document_type == "invoice" else self._dummy_extraction(document_type)
+                return (self._extract_invoice_with_regex(text) if document_type == "invoice" else self._dummy_extraction(document_type)), False
+    
+    def _mistral_chat_body(self, text: str, document_type: str) -> Dict[str, Any]:
+        """Build the Mistral chat completion request body for a text-only extraction"""
+        prompt = self._generate_extraction_prompt(document_type)
+        
+        # Preprocess text to optimize extraction
+        processed_text = self.preprocess_text(text, document_type)
+        
+        # Create system message for better context
+        system_message = _mistral_system_message(document_type)
+        
+        return {
+            "model": "mistral-large-latest",  # Always use latest version
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": f"{prompt}\n\nText extracted from document:\n{processed_text}"}
+            ],
+            "temperature": 0.0,  # Use 0 temperature for deterministic outputs
+            "max_tokens": 2000,  # Increased from 1000 to allow for more detailed extraction
+            "response_format": {"type": "json_object"}
+        }
     
-    def _extract_with_mistral(self, text: str, document_type: str) -> Dict[str, Any]:
-        """Extract data using Mistral's text capabilities"""
+    def _extract_with_mistral(self, text: str, document_type: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Extract data using Mistral's text capabilities, falling back to regex or placeholder data.
+        Returns the data and whether the model answered, as extract_data_with_status does
+        """
         try:
-            prompt = self._generate_extraction_prompt(document_type)
-            
-            # Preprocess text to optimize extraction
-            processed_text = self.preprocess_text(text, document_type)
+            body = self._mistral_chat_body(text, document_type)
             
             # Log that we're using Mistral AI
             logger.info(f"Sending request to Mistral AI for {document_type} document extraction")
             
-            # Create system message for better context
-            system_message = f"You are an expert document analysis system specialized in extracting structured information from {document_type}s. Extract all relevant information from the provided document and return a complete JSON object with all fields."
-            
-            response = httpx.post(
+            response = _http_client().post(
                 "https://api.mistral.ai/v1/chat/completions",
                 headers={
                     "Authorization": f"Bearer {self.mistral_api_key}",
                     "Content-Type": "application/json"
                 },
-                json={
-                    "model": "mistral-large-latest",  # Always use latest version
-                    "messages": [
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": f"{prompt}\n\nText extracted from document:\n{processed_text}"}
-                    ],
-                    "temperature": 0.0,  # Use 0 temperature for deterministic outputs
-                    "max_tokens": 2000,  # Increased from 1000 to allow for more detailed extraction
-                    "response_format": {"type": "json_object"}
-                },
+                json=body,
                 timeout=60.0  # Increased timeout for more complex documents
             )
             
             response.raise_for_status()
-            result = response.json()
+            result = _json_loads(response.content)
             
             # Extract the JSON response
             content = result["choices"][0]["message"]["content"]
-            extracted_data = json.loads(content)
+            extracted_data = _json_loads(content)
             
             # Log successful extraction
             logger.info(f"Successfully extracted data from {document_type} document using Mistral AI")
             
             # For debugging, log the extracted data summary
-            fields_extracted = list(filter(lambda k: extracted_data.get(k) is not None, extracted_data.keys()))
-            logger.debug(f"Fields successfully extracted: {fields_extracted}")
+            if logger.isEnabledFor(logging.DEBUG):
+                fields_extracted = [field for field, value in extracted_data.items() if value is not None]
+                logger.debug("Fields successfully extracted: %s", fields_extracted)
             
-            return extracted_data
+            return extracted_data, True
             
         except Exception as e:
             logger.error(f"Error in Mistral extraction: {str(e)}")
@@ -463,7 +776,89 @@ IMPORTANT: When extracting tables from documents:
             extracted_data = self._extract_invoice_with_regex(text) if document_type == "invoice" else self._dummy_extraction(document_type)
             if not self._is_valid_extraction(extracted_data, document_type):
                 extracted_data = self._dummy_extraction(document_type)
-            return extracted_data
+            return extracted_data, False
+    
+    def create_batch(self, documents: List[Tuple[str, str, str]]) -> str:
+        """
+        Submit text-only extractions for several documents as one Mistral batch job.
+        Batch jobs are billed at a discount and don't count against the chat rate limits,
+        but complete asynchronously; poll them with get_batch.
+        
+        Parameters:
+        - documents: (custom_id, document text, document type) for each document
+        
+        Returns:
+        - ID of the batch job
+        """
+        headers = {"Authorization": f"Bearer {self.mistral_api_key}"}
+        # One request per document rather than several documents packed into one prompt: the
+        # job already amortises the per-call latency and rate limit, and a packed prompt would
+        # tie every document to one JSON array (one malformed entry fails them all), bypass the
+        # per-document LLM cache and let fields leak between neighbouring documents
+        lines = []
+        for custom_id, text, document_type in documents:
+            body = self._mistral_chat_body(text, document_type)
+            # The batch job sets the model for every request
+            del body["model"]
+            lines.append(json.dumps({"custom_id": custom_id, "body": body}))
+        
+        # Upload the requests as a JSONL file, then start the job on it
+        logger.info(f"Submitting batch extraction for {len(documents)} documents to Mistral AI")
+        upload = _http_client().post(
+            "https://api.mistral.ai/v1/files",
+            headers=headers,
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+            timeout=60.0
+        )
+        upload.raise_for_status()
+        
+        job = _http_client().post(
+            "https://api.mistral.ai/v1/batch/jobs",
+            headers=headers,
+            json={
+                "input_files": [upload.json()["id"]],
+                "model": "mistral-large-latest",
+                "endpoint": "/v1/chat/completions"
+            },
+            timeout=30.0
+        )
+        job.raise_for_status()
+        return job.json()["id"]
+    
+    def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Get the status of a batch job and, once it has finished, its results.
+        
+        Returns:
+        - Dictionary with the job "status" and, when output is available, "results"
+          mapping each custom_id to its extracted data or an {"error": ...} entry
+        """
+        headers = {"Authorization": f"Bearer {self.mistral_api_key}"}
+        response = _http_client().get(f"https://api.mistral.ai/v1/batch/jobs/{batch_id}", headers=headers, timeout=30.0)
+        response.raise_for_status()
+        job = response.json()
+        
+        batch = {"status": job["status"]}
+        if not job.get("output_file"):
+            return batch
+        
+        output = _http_client().get(f"https://api.mistral.ai/v1/files/{job['output_file']}/content", headers=headers, timeout=60.0)
+        output.raise_for_status()
+        
+        results = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            entry = _json_loads(line)
+            try:
+                content = entry["response"]["body"]["choices"][0]["message"]["content"]
+                results[entry["custom_id"]] = _json_loads(content)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                logger.error(f"Error parsing batch result {entry.get('custom_id')}: {str(e)}")
+                results[entry.get("custom_id")] = {"error": str(entry.get("error") or e)}
+        batch["results"] = results
+        return batch
     
     def _generate_extraction_prompt(self, document_type: str) -> str:
         """Generate an appropriate prompt based on document type"""
@@ -554,8 +949,16 @@ IMPORTANT: When extracting tables from documents:
     
     def _extract_invoice_with_regex(self, text: str) -> Dict[str, str]:
         """Extract invoice data using regular expressions for common patterns"""
+        # extract_data and the AI fallbacks run this on the same text after a failed call, so
+        # results are memoized; callers get their own copy since they modify the result
+        return copy.deepcopy(self._invoice_regex_result(text))
+    
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _invoice_regex_result(text: str) -> Dict[str, str]:
+        """Regex extraction behind _extract_invoice_with_regex, cached per text"""
         logger.debug("Attempting direct regex extraction for invoice")
-        logger.debug(f"Attempting regex extraction on text of length {len(text)}")
+        logger.debug("Attempting regex extraction on text of length %d", len(text))
         
         # Initialize result dictionary with more comprehensive fields
         result = {
@@ -577,92 +980,39 @@ IMPORTANT: When extracting tables from documents:
             "tax_id": None
         }
         
-        # Common regex patterns for invoice fields - improved with more patterns
-        patterns = {
-            "invoice_number": [
-                r"(?i)invoice\s*(?:#|number|no)?[:.\s]*\s*(INV[a-zA-Z0-9\-]+|\d+[-\w]*)",
-                r"(?i)(?:INV|INVOICE)[:\-\s]*(\d+(?:[-\/]\d+)*)"
-            ],
-            "supplier_name": [
-                r"(?i)(?:==+|--+)\s*([\w\s]+(?:INC|LLC|LTD|CORP|CO)(?:\.)?)\s*(?:==+|--+)",
-                r"(?i)(ACME\s+CORPORATION,\s+INC\.)",
-                r"(?i)(TECH\s+SOLUTIONS\s+INC\.)",
-                r"(?i)^([A-Z\s]+(?:INC|LLC|LTD|CORP|CO)(?:\.|,)?\s*(?:INC|LLC|LTD|CORP|CO)?\.?)$",
-                r"(?i)FROM:?\s*([\w\s\.,&]+)(?:\r|\n|$)"
-            ],
-            "invoice_date": [
-                r"(?i)(?:invoice|issue)\s*date[:.\s]\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
-                r"(?i)Date:\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4})",
-                r"(?i)DATE(?:\s+)?:(?:\s+)?([A-Z][a-z]+\s+\d{1,2},?\s+\d{4})"
-            ],
-            "total_amount": [
-                r"(?i)(?:total|amount|sum|balance|due)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})",
-                r"(?i)(?:TOTAL\s+DUE)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})",
-                r"(?i)TOTAL\s+DUE:?\s*\$?([\d,]+\.\d{2})"
-            ],
-            "subtotal_amount": [
-                r"(?i)(?:subtotal|sub-total|sub total)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})",
-                r"(?i)Subtotal:?\s*\$?([\d,]+\.\d{2})"
-            ],
-            "vat_amount": [
-                r"(?i)(?:vat|tax|gst|hst)[:.\s]+\s*[$€£¥]?\s*([\d,]+\.\d{2})",
-                r"(?i)(?:Tax)\s+\(\d+(?:\.\d+)?%\)[:.\s]+\s*\$\s*([\d,]+\.\d{2})",
-                r"(?i)Tax\s+\((\d+(?:\.\d+)?)%\)[:.\s]+\s*\$\s*[\d,]+\.\d{2}"
-            ],
-            "tax_rate": [
-                r"(?i)(?:Tax|VAT)\s+\((\d+(?:\.\d+)?)%\)",
-                r"(?i)(?:Tax|VAT) rate:?\s*(\d+(?:\.\d+)?)%"
-            ],
-            "payment_due_date": [
-                r"(?i)(?:payment|due)\s*date[:.\s]\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4}|\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
-                r"(?i)Due\s+Date:\s*([a-zA-Z]+\s+\d{1,2},?\s+\d{4})"
-            ],
-            "payment_terms": [
-                r"(?i)(?:payment\s+terms|terms):?\s*(Net\s+\d+|Due on Receipt|[^\r\n,]+)",
-                r"(?i)Payment\s+Terms:?\s*(Net\s+\d+)",
-                r"(?i)Terms:?\s*(Net\s+\d+)"
-            ],
-            "client_name": [
-                r"(?i)(?:BILL\s+TO|SOLD\s+TO|CUSTOMER|CLIENT)[:.\s]*\s*(?:Name)?[:.\s]*\s*([A-Za-z0-9\s\.,&]+)(?:\r|\n|$)",
-                r"(?i)Client\s+Name:?\s*([^\r\n]+)"
-            ],
-            "client_address": [
-                r"(?i)(?:BILL\s+TO|SOLD\s+TO):?(?:.*\r?\n){1}((?:.*\r?\n){1,4})",
-                r"(?i)Address:?\s*([^\r\n]+(?:\r?\n[^\r\n]+){0,3})"
-            ],
-            "purchase_order": [
-                r"(?i)(?:P\.?O\.?|Purchase\s+Order)(?:\s+#|\s+No\.?|\s+Number)?:?\s*([A-Za-z0-9\-]+)"
-            ],
-            "account_number": [
-                r"(?i)(?:Account|Customer|Client)(?:\s+#|\s+No\.?|\s+Number)?:?\s*([A-Za-z0-9\-]+)",
-                r"(?i)Account\s+Number:?\s*(\d+(?:-\d+)*)"
-            ],
-            "tax_id": [
-                r"(?i)(?:Tax|VAT)\s+(?:ID|Number):?\s*([A-Za-z0-9\-]+)",
-                r"(?i)(?:EIN|FEIN|Federal ID):?\s*([A-Za-z0-9\-]+)"
-            ]
-        }
+        # Skip fields whose keywords are missing. Only for ASCII text, where lower() folds case
+        # exactly like re.IGNORECASE does (it also matches e.g. the Kelvin sign against "k")
+        text_lower = text.lower() if text.isascii() else None
+        plain_ascii = _is_plain_ascii(text)
+        table = _INVOICE_REGEX_PATTERNS_ASCII if plain_ascii else _INVOICE_REGEX_PATTERNS
         
-        # Apply each regex pattern and extract data
-        for field, pattern_list in patterns.items():
+        # Apply each regex pattern and extract data. Patterns run over the whole text rather
+        # than line by line: the client address, supplier and line item patterns match across
+        # line breaks, and the text already stays cache-resident between the searches. Each
+        # search stops at its first match, so only patterns that don't match read to the end
+        for field, pattern_list in table.items():
+            if text_lower is not None and not any(keyword in text_lower for keyword in _INVOICE_REGEX_KEYWORDS[field]):
+                continue
             for pattern in pattern_list:
-                match = re.search(pattern, text)
+                match = pattern.search(text)
                 if match:
                     if field == "tax_rate":
                         # For tax rate, we want to store as a number with % sign
                         result[field] = match.group(1).strip() + "%"
                     else:
+                        # group().strip() trims in C; walking the span by hand in Python is slower
                         result[field] = match.group(1).strip()
-                    logger.debug(f"Found {field}: {result[field]} using pattern: {pattern}")
+                    logger.debug("Found %s: %s using pattern: %s", field, result[field], pattern.pattern)
                     break  # Break once we find a match for this field
         
         # Extract line items - this is complex and requires more sophisticated parsing
         # Try to extract line items from common tabular formats
         line_items = []
         
-        # Look for tabular data with descriptions and amounts
-        item_pattern = r"(?i)([A-Za-z0-9\s\-\'\"\/\.,&]+)\s+\|\s*(\d+)\s+\|\s*\$?([\d,]+\.\d{2})\s+\|\s*\$?([\d,]+\.\d{2})"
-        item_matches = re.findall(item_pattern, text)
+        # Look for tabular data with descriptions and amounts. The two layouts stay separate
+        # scans (the plain one only runs when the pipe one finds nothing, which a fused pattern
+        # can't express); the pipe scan is skipped outright when there is no pipe to match
+        item_matches = (_LINE_ITEM_PIPE_RE_ASCII if plain_ascii else _LINE_ITEM_PIPE_RE).findall(text) if "|" in text else []
         
         if item_matches:
             for match in item_matches:
@@ -676,8 +1026,7 @@ IMPORTANT: When extracting tables from documents:
         
         # Another pattern for items without the pipe separator
         if not line_items:
-            item_pattern2 = r"(?i)([A-Za-z0-9\s\-\'\"\/\.,&]+)\s+(\d+)\s+\$?([\d,]+\.\d{2})\s+\$?([\d,]+\.\d{2})"
-            item_matches = re.findall(item_pattern2, text)
+            item_matches = (_LINE_ITEM_RE_ASCII if plain_ascii else _LINE_ITEM_RE).findall(text)
             
             if item_matches:
                 for match in item_matches:
@@ -694,7 +1043,7 @@ IMPORTANT: When extracting tables from documents:
             result["line_items"] = line_items
         
         # Try to determine currency
-        currency_match = re.search(r"(?i)(?:amount|total|price).*?([$€£¥])", text)
+        currency_match = _CURRENCY_RE.search(text)
         if currency_match:
             result["currency"] = currency_match.group(1)
         
@@ -709,29 +1058,17 @@ IMPORTANT: When extracting tables from documents:
                     extracted_data.get("total_amount") is not None)
         else:
             # For other document types, we'll consider it valid if it has at least one non-null field
-            return any(v is not None for v in extracted_data.values())
+            # (counting the Nones in C rather than stepping a generator; values are parsed JSON)
+            return list(extracted_data.values()).count(None) < len(extracted_data)
     
     def _dummy_extraction(self, document_type: str) -> Dict[str, str]:
         """Return dummy data when extraction fails completely"""
         logger.warning(f"Using dummy extraction for {document_type}")
         
         if document_type == "invoice":
-            return {
-                "invoice_number": "INV-2023-0001",
-                "supplier_name": "ACME Corporation",
-                "invoice_date": "January 1, 2023",
-                "total_amount": "100.00",
-                "vat_amount": "20.00",
-                "payment_due_date": "January 30, 2023"
-            }
+            return _DUMMY_INVOICE.copy()
         elif document_type == "receipt":
-            return {
-                "merchant_name": "Local Store",
-                "date": "January 1, 2023",
-                "total_amount": "75.50",
-                "items": ["Item 1 - $25.00", "Item 2 - $50.50"],
-                "payment_method": "Credit Card"
-            }
+            return {**_DUMMY_RECEIPT, "items": _DUMMY_RECEIPT["items"].copy()}
         else:
             return {
                 "type": document_type,
@@ -769,7 +1106,7 @@ IMPORTANT: When extracting tables from documents:
             # If regex found the field and multimodal didn't, add it
             if field in regex_data and regex_data[field] and field not in result:
                 augmented_result[field] = regex_data[field]
-                logger.debug(f"Added missing field {field} from regex extraction: {regex_data[field]}")
+                logger.debug("Added missing field %s from regex extraction: %s", field, regex_data[field])
             
             # If both found the field but with different values, use regex (usually more precise)
             elif field in regex_data and regex_data[field] and field in result:
@@ -779,7 +1116,7 @@ IMPORTANT: When extracting tables from documents:
                 
                 if regex_value != result_value:
                     augmented_result[field] = regex_data[field]
-                    logger.debug(f"Updated field {field} with regex extraction: {regex_data[field]}")
+                    logger.debug("Updated field %s with regex extraction: %s", field, regex_data[field])
         
         # For line items, check if both extractions have them and same count
         if 'line_items' in result and 'line_items' in regex_data:
@@ -789,13 +1126,13 @@ IMPORTANT: When extracting tables from documents:
                 for i in range(len(augmented_result['line_items'])):
                     if 'description' in regex_data['line_items'][i]:
                         # Clean up description by removing dashes and formatting
-                        clean_desc = re.sub(r'[-_=]{3,}', '', regex_data['line_items'][i]['description'])
-                        clean_desc = re.sub(r'\s{2,}', ' ', clean_desc).strip()
+                        clean_desc = _RULE_CHARS_RE.sub('', regex_data['line_items'][i]['description'])
+                        clean_desc = _REPEATED_SPACE_RE.sub(' ', clean_desc).strip()
                         
                         # Update only if we have a reasonable description (not just whitespace)
                         if clean_desc:
                             augmented_result['line_items'][i]['description'] = clean_desc
-                            logger.debug(f"Cleaned up line item {i} description")
+                            logger.debug("Cleaned up line item %d description", i)
         
         logger.info("Applied regex augmentation to multimodal extraction")
         return augmented_result 
\ No newline at end of file
@@ -3,21 +3,114 @@ import json
 import logging
 import re
 from typing import Dict, Any, Optional, List, Tuple
-import httpx
 
-from utils.ai_extractor import AIExtractor
+from utils.ai_extractor import AIExtractor, _ascii_patterns, _is_plain_ascii, _http_client, _json_loads
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Common regex patterns for contract fields, in order of preference per field. They are
+# searched one at a time: a fused alternation scans faster but only yields non-overlapping
+# matches, so e.g. "DATE:" inside "SIGNATURE DATE:" or a later preferred pattern is lost.
+# Unlike the invoice patterns these stay on re even with RE2 installed: none backtracks
+# superlinearly, and a contract matches most of them, where RE2 measured about 4x slower
+_CONTRACT_REGEX_PATTERNS = {
+    "contract_number": [
+        re.compile(r"CONTRACT\s+NUMBER:?\s*([A-Z0-9]+-[A-Z0-9]+-[A-Z0-9]+)", re.IGNORECASE),
+        re.compile(r"CONTRACT\s+(?:NO|NUMBER|#):?\s*([A-Z0-9\-]+)", re.IGNORECASE)
+    ],
+    "client_name": [
+        re.compile(r"Between:[\s\n]*([A-Za-z0-9\s]+)(?:\s*\(.*?Client.*?\))?", re.IGNORECASE),
+        re.compile(r"CLIENT:?\s*([A-Za-z0-9\s,\.]+)", re.IGNORECASE),
+        re.compile(r"(?:CLIENT|CUSTOMER):?\s*([A-Za-z0-9\s]+(?:Ltd\.?|LLC|Inc\.?|Corporation|Corp\.?|GmbH)?)", re.IGNORECASE)
+    ],
+    "service_provider": [
+        re.compile(r"And:[\s\n]*([A-Za-z0-9\s]+)(?:\s*\(.*?Service Provider.*?\))?", re.IGNORECASE),
+        re.compile(r"SERVICE\s+PROVIDER:?\s*([A-Za-z0-9\s,\.]+)", re.IGNORECASE),
+        re.compile(r"(?:SERVICE\s+PROVIDER|VENDOR|SUPPLIER):?\s*([A-Za-z0-9\s]+(?:Ltd\.?|LLC|Inc\.?|Corporation|Corp\.?|GmbH)?)", re.IGNORECASE)
+    ],
+    "start_date": [
+        re.compile(r"START\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE),
+        re.compile(r"EFFECTIVE\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE),
+        re.compile(r"COMMENCEMENT\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE)
+    ],
+    "end_date": [
+        re.compile(r"END\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE),
+        re.compile(r"EXPIRATION\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE),
+        re.compile(r"TERMINATION\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE)
+    ],
+    "payment_terms_text": [
+        re.compile(r"PAYMENT\s+TERMS:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE),
+        re.compile(r"PAYMENT:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE)
+    ],
+    "renewal_clause": [
+        re.compile(r"RENEWAL(?:\s+CLAUSE)?:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE),
+        re.compile(r"CONTRACT\s+RENEWAL:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE)
+    ],
+    "termination_conditions": [
+        re.compile(r"TERMINATION(?:\s+CONDITIONS)?:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE),
+        re.compile(r"(?:CONTRACT\s+)?TERMINATION:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE)
+    ],
+    "client_obligations": [
+        re.compile(r"CLIENT\s+OBLIGATIONS:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE),
+        re.compile(r"OBLIGATIONS\s+OF\s+(?:THE\s+)?CLIENT:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE)
+    ],
+    "service_provider_obligations": [
+        re.compile(r"(?:SERVICE\s+PROVIDER|SUPPLIER|VENDOR)\s+OBLIGATIONS:?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE),
+        re.compile(r"OBLIGATIONS\s+OF\s+(?:THE\s+)?(?:SERVICE\s+PROVIDER|SUPPLIER|VENDOR):?\s*([^\n.]+(?:\n[^\n.]+)*)", re.IGNORECASE)
+    ],
+    "signatures_client": [
+        re.compile(r"(?:CLIENT|CUSTOMER)\s+SIGNATURE:?\s*([A-Za-z\s,\.]+)", re.IGNORECASE),
+        re.compile(r"FOR\s+(?:THE\s+)?(?:CLIENT|CUSTOMER):?\s*([A-Za-z\s,\.]+)", re.IGNORECASE)
+    ],
+    "signatures_provider": [
+        re.compile(r"(?:SERVICE\s+PROVIDER|SUPPLIER|VENDOR)\s+SIGNATURE:?\s*([A-Za-z\s,\.]+)", re.IGNORECASE),
+        re.compile(r"FOR\s+(?:THE\s+)?(?:SERVICE\s+PROVIDER|SUPPLIER|VENDOR):?\s*([A-Za-z\s,\.]+)", re.IGNORECASE)
+    ],
+    "signatures_date": [
+        re.compile(r"(?:SIGNING|SIGNATURE)\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE),
+        re.compile(r"DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})", re.IGNORECASE)
+    ]
+}
+_CONTRACT_REGEX_PATTERNS_ASCII = _ascii_patterns(_CONTRACT_REGEX_PATTERNS)
+
+# Literals every pattern of a field needs one of, checked against the lowercased text the
+# same way as the invoice regex keywords in ai_extractor
+_CONTRACT_REGEX_KEYWORDS = {
+    "contract_number": ("contract",),
+    "client_name": ("between", "client", "customer"),
+    "service_provider": ("and:", "service", "vendor", "supplier"),
+    "start_date": ("date",),
+    "end_date": ("date",),
+    "payment_terms_text": ("payment",),
+    "renewal_clause": ("renewal",),
+    "termination_conditions": ("termination",),
+    "client_obligations": ("obligations",),
+    "service_provider_obligations": ("obligations",),
+    "signatures_client": ("client", "customer"),
+    "signatures_provider": ("service", "supplier", "vendor"),
+    "signatures_date": ("date",)
+}
+
+# Fallback for the parties named at the top of the contract
+_BETWEEN_AND_RE = re.compile(r"Between:[\s\n]*([A-Za-z0-9\s,\.]+)[\s\S]*?And:[\s\n]*([A-Za-z0-9\s,\.]+)", re.IGNORECASE)
+
+# Separators between listed obligations
+_OBLIGATION_SPLIT_RE = re.compile(r'[,;\n]')
+
+# Structured payment information within the payment terms text
+_PAYMENT_AMOUNT_RE = re.compile(r"(?:amount|fee|cost|price)(?:\s+of)?:?\s*(\$?[\d,]+(?:\.\d+)?(?:\s*[A-Za-z]+)?|\w+\s+(?:thousand|million|billion)(?:\s+dollars)?)", re.IGNORECASE)
+_PAYMENT_SCHEDULE_RE = re.compile(r"(?:schedule|frequency|payment\s+terms|payment\s+schedule|paid):?\s*(\w+(?:\s+\w+){0,5})", re.IGNORECASE)
+_PAYMENT_METHODS_RE = re.compile(r"(?:method|payment\s+method|pay(?:able)?\s+by):?\s*(\w+(?:\s+\w+){0,5})", re.IGNORECASE)
+
 class EnhancedContractExtractor(AIExtractor):
     """
     Enhanced extractor class for contracts with specialized extraction and summary generation.
     Extends the base AIExtractor with contract-specific capabilities.
     """
     
-    def extract_data(self, document_content: str, document_type: str, image_path: str = None) -> Dict[str, Any]:
+    def extract_data_with_status(self, document_content: str, document_type: str, image_path: str = None) -> Tuple[Dict[str, Any], bool]:
         """
         Override the base extraction method to add contract-specific enhancements
         
@@ -28,27 +121,29 @@ class EnhancedContractExtractor(AIExtractor):
         
         Returns:
         - Dictionary of extracted fields including summary for contracts
+        - Whether the AI model answered, as for AIExtractor.extract_data_with_status
         """
         # Only apply special handling for contracts
         if document_type != "contract":
-            return super().extract_data(document_content, document_type, image_path)
+            return super().extract_data_with_status(document_content, document_type, image_path)
         
         logger.info("Using enhanced contract extraction with AI as primary method and regex augmentation")
         
         # First perform AI extraction as the primary method
         extracted_data = {}
+        from_model = False
         
         # Always attempt AI extraction
         try:
             # Select the appropriate AI model based on configuration
             if self.model == "pixtral" and image_path and os.path.exists(image_path):
-                extracted_data = self._extract_with_pixtral(document_content, document_type, image_path)
+                extracted_data, from_model = self._extract_with_pixtral(document_content, document_type, image_path)
                 logger.info("Successfully extracted contract data with Pixtral multimodal model")
             elif self.model == "pixtral":
-                extracted_data = self._extract_with_pixtral(document_content, document_type)
+                extracted_data, from_model = self._extract_with_pixtral(document_content, document_type)
                 logger.info("Successfully extracted contract data with Pixtral text model")
             else:
-                extracted_data = self._extract_with_mistral(document_content, document_type)
+                extracted_data, from_model = self._extract_with_mistral(document_content, document_type)
                 logger.info("Successfully extracted contract data with Mistral model")
                 
         except Exception as e:
@@ -77,7 +172,7 @@ class EnhancedContractExtractor(AIExtractor):
         # Generate a summary of the contract
         extracted_data["summary"] = self._generate_contract_summary(document_content, extracted_data)
         
-        return extracted_data
+        return extracted_data, from_model
     
     def _augment_with_regex(self, ai_data: Dict[str, Any], regex_data: Dict[str, Any]) -> None:
         """
@@ -189,71 +284,17 @@ class EnhancedContractExtractor(AIExtractor):
         }
         
         try:
-            # Common regex patterns for contract fields
-            patterns = {
-                "contract_number": [
-                    r"(?i)CONTRACT\s+NUMBER:?\s*([A-Z0-9]+-[A-Z0-9]+-[A-Z0-9]+)",
-                    r"(?i)CONTRACT\s+(?:NO|NUMBER|#):?\s*([A-Z0-9\-]+)"
-                ],
-                "client_name": [
-                    r"(?i)Between:[\s\n]*([A-Za-z0-9\s]+)(?:\s*\(.*?Client.*?\))?",
-                    r"(?i)CLIENT:?\s*([A-Za-z0-9\s,\.]+)",
-                    r"(?i)(?:CLIENT|CUSTOMER):?\s*([A-Za-z0-9\s]+(?:Ltd\.?|LLC|Inc\.?|Corporation|Corp\.?|GmbH)?)"
-                ],
-                "service_provider": [
-                    r"(?i)And:[\s\n]*([A-Za-z0-9\s]+)(?:\s*\(.*?Service Provider.*?\))?",
-                    r"(?i)SERVICE\s+PROVIDER:?\s*([A-Za-z0-9\s,\.]+)",
-                    r"(?i)(?:SERVICE\s+PROVIDER|VENDOR|SUPPLIER):?\s*([A-Za-z0-9\s]+(?:Ltd\.?|LLC|Inc\.?|Corporation|Corp\.?|GmbH)?)"
-                ],
-                "start_date": [
-                    r"(?i)START\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})",
-                    r"(?i)EFFECTIVE\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})",
-                    r"(?i)COMMENCEMENT\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})"
-                ],
-                "end_date": [
-                    r"(?i)END\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})",
-                    r"(?i)EXPIRATION\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})",
-                    r"(?i)TERMINATION\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})"
-                ],
-                "payment_terms_text": [
-                    r"(?i)PAYMENT\s+TERMS:?\s*([^\n.]+(?:\n[^\n.]+)*)",
-                    r"(?i)PAYMENT:?\s*([^\n.]+(?:\n[^\n.]+)*)"
-                ],
-                "renewal_clause": [
-                    r"(?i)RENEWAL(?:\s+CLAUSE)?:?\s*([^\n.]+(?:\n[^\n.]+)*)",
-                    r"(?i)CONTRACT\s+RENEWAL:?\s*([^\n.]+(?:\n[^\n.]+)*)"
-                ],
-                "termination_conditions": [
-                    r"(?i)TERMINATION(?:\s+CONDITIONS)?:?\s*([^\n.]+(?:\n[^\n.]+)*)",
-                    r"(?i)(?:CONTRACT\s+)?TERMINATION:?\s*([^\n.]+(?:\n[^\n.]+)*)"
-                ],
-                "client_obligations": [
-                    r"(?i)CLIENT\s+OBLIGATIONS:?\s*([^\n.]+(?:\n[^\n.]+)*)",
-                    r"(?i)OBLIGATIONS\s+OF\s+(?:THE\s+)?CLIENT:?\s*([^\n.]+(?:\n[^\n.]+)*)"
-                ],
-                "service_provider_obligations": [
-                    r"(?i)(?:SERVICE\s+PROVIDER|SUPPLIER|VENDOR)\s+OBLIGATIONS:?\s*([^\n.]+(?:\n[^\n.]+)*)",
-                    r"(?i)OBLIGATIONS\s+OF\s+(?:THE\s+)?(?:SERVICE\s+PROVIDER|SUPPLIER|VENDOR):?\s*([^\n.]+(?:\n[^\n.]+)*)"
-                ],
-                "signatures_client": [
-                    r"(?i)(?:CLIENT|CUSTOMER)\s+SIGNATURE:?\s*([A-Za-z\s,\.]+)",
-                    r"(?i)FOR\s+(?:THE\s+)?(?:CLIENT|CUSTOMER):?\s*([A-Za-z\s,\.]+)"
-                ],
-                "signatures_provider": [
-                    r"(?i)(?:SERVICE\s+PROVIDER|SUPPLIER|VENDOR)\s+SIGNATURE:?\s*([A-Za-z\s,\.]+)",
-                    r"(?i)FOR\s+(?:THE\s+)?(?:SERVICE\s+PROVIDER|SUPPLIER|VENDOR):?\s*([A-Za-z\s,\.]+)"
-                ],
-                "signatures_date": [
-                    r"(?i)(?:SIGNING|SIGNATURE)\s+DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})",
-                    r"(?i)DATE:?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})"
-                ]
-            }
+            # Skip fields whose keywords are missing (ASCII text only, see _invoice_regex_result)
+            text_lower = text.lower() if text.isascii() else None
+            table = _CONTRACT_REGEX_PATTERNS_ASCII if _is_plain_ascii(text) else _CONTRACT_REGEX_PATTERNS
             
             # Extract simple fields using regex patterns
-            for field, field_patterns in patterns.items():
+            for field, field_patterns in table.items():
+                if text_lower is not None and not any(keyword in text_lower for keyword in _CONTRACT_REGEX_KEYWORDS[field]):
+                    continue
                 for pattern in field_patterns:
                     try:
-                        match = re.search(pattern, text)
+                        match = pattern.search(text)
                         if match and match.groups():  # Ensure there are capture groups
                             if field == "payment_terms_text":
                                 # Process payment terms into structured data
@@ -265,14 +306,14 @@ class EnhancedContractExtractor(AIExtractor):
                                 obligations = match.group(1).strip() if len(match.groups()) >= 1 else ""
                                 if obligations:
                                     # Split by commas, semicolons, or line breaks
-                                    items = re.split(r'[,;\n]', obligations)
+                                    items = _OBLIGATION_SPLIT_RE.split(obligations)
                                     result["legal_obligations"]["client"] = [item.strip() for item in items if item.strip()]
                             elif field == "service_provider_obligations":
                                 # Add to obligations list
                                 obligations = match.group(1).strip() if len(match.groups()) >= 1 else ""
                                 if obligations:
                                     # Split by commas, semicolons, or line breaks
-                                    items = re.split(r'[,;\n]', obligations)
+                                    items = _OBLIGATION_SPLIT_RE.split(obligations)
                                     result["legal_obligations"]["service_provider"] = [item.strip() for item in items if item.strip()]
                             elif field == "signatures_client":
                                 signature = match.group(1).strip() if len(match.groups()) >= 1 else ""
@@ -299,15 +340,14 @@ class EnhancedContractExtractor(AIExtractor):
                             break
                     except (IndexError, re.error) as e:
                         # Regex error - log and continue
-                        logger.warning(f"Regex error for pattern '{pattern}': {str(e)}")
+                        logger.warning(f"Regex error for pattern '{pattern.pattern}': {str(e)}")
                         continue
             
             # Fallback to extract client and service provider from the beginning of the contract if not found
             if not result["client_name"] or not result["service_provider"]:
                 try:
                     # Look for "Between: [Company A] ... And: [Company B]" pattern
-                    between_and_pattern = r"(?i)Between:[\s\n]*([A-Za-z0-9\s,\.]+)[\s\S]*?And:[\s\n]*([A-Za-z0-9\s,\.]+)"
-                    match = re.search(between_and_pattern, text[:500])  # Only search in the first 500 chars
+                    match = _BETWEEN_AND_RE.search(text, 0, 500)  # Only search in the first 500 chars
                     if match and len(match.groups()) >= 2:
                         if not result["client_name"] and len(match.groups()) >= 1:
                             result["client_name"] = match.group(1).strip()
@@ -333,20 +373,17 @@ class EnhancedContractExtractor(AIExtractor):
         
         try:
             # Extract amount
-            amount_pattern = r"(?i)(?:amount|fee|cost|price)(?:\s+of)?:?\s*(\$?[\d,]+(?:\.\d+)?(?:\s*[A-Za-z]+)?|\w+\s+(?:thousand|million|billion)(?:\s+dollars)?)"
-            amount_match = re.search(amount_pattern, payment_text)
+            amount_match = _PAYMENT_AMOUNT_RE.search(payment_text)
             if amount_match and amount_match.groups() and len(amount_match.groups()) >= 1:
                 result["amount"] = amount_match.group(1).strip()
             
             # Extract schedule
-            schedule_pattern = r"(?i)(?:schedule|frequency|payment\s+terms|payment\s+schedule|paid):?\s*(\w+(?:\s+\w+){0,5})"
-            schedule_match = re.search(schedule_pattern, payment_text)
+            schedule_match = _PAYMENT_SCHEDULE_RE.search(payment_text)
             if schedule_match and schedule_match.groups() and len(schedule_match.groups()) >= 1:
                 result["schedule"] = schedule_match.group(1).strip()
             
             # Extract payment methods
-            methods_pattern = r"(?i)(?:method|payment\s+method|pay(?:able)?\s+by):?\s*(\w+(?:\s+\w+){0,5})"
-            methods_match = re.search(methods_pattern, payment_text)
+            methods_match = _PAYMENT_METHODS_RE.search(payment_text)
             if methods_match and methods_match.groups() and len(methods_match.groups()) >= 1:
                 result["methods"] = methods_match.group(1).strip()
         except Exception as e:
@@ -453,7 +490,7 @@ class EnhancedContractExtractor(AIExtractor):
             # Use the appropriate model for summary generation
             if self.model == "pixtral" and self.mistral_api_key:
                 # Use Pixtral for summary generation if available
-                response = httpx.post(
+                response = _http_client().post(
                     "https://api.mistral.ai/v1/chat/completions",
                     headers={
                         "Authorization": f"Bearer {self.mistral_api_key}",
@@ -471,11 +508,11 @@ class EnhancedContractExtractor(AIExtractor):
                     timeout=60.0
                 )
                 response.raise_for_status()
-                result = response.json()
+                result = _json_loads(response.content)
                 summary = result["choices"][0]["message"]["content"]
             else:
                 # Fallback to Mistral
-                response = httpx.post(
+                response = _http_client().post(
                     "https://api.mistral.ai/v1/chat/completions",
                     headers={
                         "Authorization": f"Bearer {self.mistral_api_key}",
@@ -493,7 +530,7 @@ class EnhancedContractExtractor(AIExtractor):
                     timeout=60.0
                 )
                 response.raise_for_status()
-                result = response.json()
+                result = _json_loads(response.content)
                 summary = result["choices"][0]["message"]["content"]
                 
             logger.info("Successfully generated contract summary")
@@ -29,6 +29,7 @@ class Document(Base):
     file_path = Column(String(255), nullable=False)
     file_size = Column(Integer, nullable=True)
     file_extension = Column(String(10), nullable=True)
+    file_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the file contents
     processed_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -70,23 +71,55 @@ class DatabaseManager:
     def __init__(self):
         """Initialize the database manager"""
         try:
-            self.engine = create_engine(DATABASE_URL)
-            self.Session = scoped_session(sessionmaker(bind=self.engine))
+            engine_options = {}
+            if not DATABASE_URL.startswith("sqlite"):
+                # Keep a pool of warm connections for concurrent requests
+                engine_options.update(pool_size=20, max_overflow=10)
+            self.engine = create_engine(DATABASE_URL, **engine_options)
+            # Objects stay usable after their session closes, e.g. when returned from a worker thread
+            self.Session = scoped_session(sessionmaker(bind=self.engine, expire_on_commit=False))
             logger.info("Database connection established")
         except Exception as e:
             logger.error(f"Error connecting to database: {str(e)}")
             raise
     
     def create_tables(self):
-        """Create database tables"""
+        """Create database tables, adding any columns an existing database doesn't have yet"""
         try:
             Base.metadata.create_all(self.engine)
+            self._add_missing_columns()
             logger.info("Database tables created successfully")
         except Exception as e:
             logger.error(f"Error creating database tables: {str(e)}")
             raise
+
+    def _add_missing_columns(self):
+        """
+        Add model columns missing from existing tables, with their indexes. create_all only
+        creates tables that don't exist and never alters one that does, so columns added to
+        a model since (e.g. Document.file_hash) are added here. They must be nullable, since
+        the table's existing rows get no value
+        """
+        inspector = sa.inspect(self.engine)
+        preparer = self.engine.dialect.identifier_preparer
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in existing]
+            if not missing:
+                continue
+
+            with self.engine.begin() as connection:
+                for column in missing:
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    connection.execute(sa.text(
+                        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+                    ))
+                    logger.info(f"Added column {table.name}.{column.name}")
+                for index in table.indexes:
+                    if any(column in missing for column in index.columns):
+                        index.create(connection)
     
-    def add_document(self, filename: str, document_type: str, file_path: str, file_size: int = None, file_extension: str = None) -> Document:
+    def add_document(self, filename: str, document_type: str, file_path: str, file_size: int = None, file_extension: str = None, file_hash: str = None) -> Document:
         """
         Add a document to the database
         
@@ -96,6 +129,7 @@ class DatabaseManager:
             file_path: Path to the document file
             file_size: Size of the file in bytes
             file_extension: File extension
+            file_hash: SHA-256 hex digest of the file contents
             
         Returns:
             Document object
@@ -107,7 +141,8 @@ class DatabaseManager:
                 document_type=document_type,
                 file_path=file_path,
                 file_size=file_size,
-                file_extension=file_extension
+                file_extension=file_extension,
+                file_hash=file_hash
             )
             session.add(document)
             session.commit()
@@ -1,6 +1,7 @@
 import os
+import io
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, convert_from_bytes
 from PIL import Image
 import docx
 import json
@@ -9,7 +10,8 @@ import pandas as pd
 from paddleocr import PaddleOCR
 import pypdf
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import re
+from typing import Dict, List, Any, Optional, Tuple, Union
 import sys
 
 # Add the project root to sys.path
@@ -23,6 +25,22 @@ logger = logging.getLogger(__name__)
 # Configure Tesseract path
 pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
+# Text extraction method for each supported file extension
+_TEXT_EXTRACTORS = {ext: "_extract_text_from_image" for ext in (".jpg", ".jpeg", ".png", ".tiff", ".bmp")}
+_TEXT_EXTRACTORS.update({".pdf": "_extract_text_from_pdf", ".docx": "_extract_text_from_docx", ".doc": "_extract_text_from_docx"})
+
+# Amounts like $1,234.56, 1,234.56 or 1234.56, and common date formats
+_AMOUNT_RE = re.compile(r'\$?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?')
+_DATE_RE = re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}', re.IGNORECASE)
+
+def _as_file(source: Union[str, bytes]) -> Union[str, io.BytesIO]:
+    """Wrap in-memory document bytes in a file object; paths are passed through"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+def _describe_source(source: Union[str, bytes]) -> str:
+    """Describe a document source for log messages"""
+    return f"<{len(source)} bytes>" if isinstance(source, bytes) else source
+
 class DocumentProcessor:
     """
     Main class for processing documents and extracting information
@@ -59,29 +77,47 @@ class DocumentProcessor:
         # Determine file type
         file_extension = os.path.splitext(file_path)[1].lower()
         
-        # Extract text based on file type
-        if file_extension == '.pdf':
-            text = self._extract_text_from_pdf(file_path)
-        elif file_extension in ['.jpg', '.jpeg', '.png', '.tiff', '.bmp']:
-            text = self._extract_text_from_image(file_path)
-        elif file_extension in ['.docx', '.doc']:
-            text = self._extract_text_from_docx(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {file_extension}")
+        text = self.extract_text(file_path, file_extension)
+        return self._extract_fields(text, file_path)
+    
+    def process_bytes(self, data: bytes, file_extension: str, file_path: str = "") -> Tuple[Dict[str, Any], str]:
+        """
+        Process a document that is already in memory, e.g. an upload
         
-        # Extract information based on document type
+        Args:
+            data: Raw contents of the document
+            file_extension: Extension of the document, including the dot
+            file_path: Path the document is stored at, if any
+            
+        Returns:
+            Dictionary containing extracted information, and the document text
+        """
+        logger.info(f"Processing {self.document_type} from memory ({len(data)} bytes)")
+        
+        text = self.extract_text(data, file_extension)
+        return self._extract_fields(text, file_path), text
+    
+    def extract_text(self, source: Union[str, bytes], file_extension: str) -> str:
+        """Extract text from a file path or in-memory document based on its extension"""
+        extractor = _TEXT_EXTRACTORS.get(file_extension.lower())
+        if extractor is None:
+            raise ValueError(f"Unsupported file type: {file_extension}")
+        return getattr(self, extractor)(source)
+    
+    def _extract_fields(self, text: str, file_path: str) -> Dict[str, Any]:
+        """Extract information from the document text based on document type"""
         if self.document_type == "invoice":
             return self._extract_invoice_data(text, file_path)
         elif self.document_type == "contract":
             return self._extract_contract_data(text, file_path)
     
-    def _extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from a PDF file"""
-        logger.info(f"Extracting text from PDF: {file_path}")
+    def _extract_text_from_pdf(self, file_path: Union[str, bytes]) -> str:
+        """Extract text from a PDF file or its raw bytes"""
+        logger.info(f"Extracting text from PDF: {_describe_source(file_path)}")
         
         try:
             # First try to extract text directly from PDF
-            reader = pypdf.PdfReader(file_path)
+            reader = pypdf.PdfReader(_as_file(file_path))
             logger.debug(f"PDF has {len(reader.pages)} pages")
             text = ""
             for i, page in enumerate(reader.pages):
@@ -106,10 +142,10 @@ class DocumentProcessor:
             # Fallback to OCR
             return self._ocr_pdf(file_path)
     
-    def _ocr_pdf(self, file_path: str) -> str:
-        """Apply OCR to a PDF file"""
+    def _ocr_pdf(self, file_path: Union[str, bytes]) -> str:
+        """Apply OCR to a PDF file or its raw bytes"""
         logger.info("Converting PDF to images for OCR")
-        images = convert_from_path(file_path)
+        images = convert_from_bytes(file_path) if isinstance(file_path, bytes) else convert_from_path(file_path)
         logger.debug(f"Converted PDF to {len(images)} images")
         text = ""
         
@@ -128,21 +164,21 @@ class DocumentProcessor:
         logger.debug(f"OCR sample text (first 200 chars): {text[:200]}")
         return text
     
-    def _extract_text_from_image(self, file_path: str) -> str:
-        """Extract text from an image using OCR"""
+    def _extract_text_from_image(self, file_path: Union[str, bytes]) -> str:
+        """Extract text from an image, or its raw bytes, using OCR"""
         logger.info("Extracting text from image")
-        image = Image.open(file_path)
         
         if self.ocr_engine == "tesseract":
+            image = Image.open(_as_file(file_path))
             return pytesseract.image_to_string(image)
-        else:  # paddleocr
+        else:  # paddleocr, which accepts a path or the encoded image bytes
             result = self.paddle_ocr.ocr(file_path)
             return "\n".join([line[1][0] for line in result[0]])
     
-    def _extract_text_from_docx(self, file_path: str) -> str:
-        """Extract text from a DOCX file"""
+    def _extract_text_from_docx(self, file_path: Union[str, bytes]) -> str:
+        """Extract text from a DOCX file or its raw bytes"""
         logger.info("Extracting text from DOCX")
-        doc = docx.Document(file_path)
+        doc = docx.Document(_as_file(file_path))
         return "\n".join([para.text for para in doc.paragraphs])
     
     def _extract_invoice_data(self, text: str, file_path: str) -> Dict[str, Any]:
@@ -238,20 +274,14 @@ class DocumentProcessor:
     
     def _extract_amount(self, text: str) -> str:
         """Extract an amount from text"""
-        import re
-        # Match patterns like $1,234.56 or 1,234.56 or 1234.56
-        amount_pattern = r'\$?\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?'
-        match = re.search(amount_pattern, text)
+        match = _AMOUNT_RE.search(text)
         if match:
             return match.group(0).strip()
         return ""
     
     def _extract_date(self, text: str) -> str:
         """Extract a date from text"""
-        import re
-        # Match common date formats
-        date_pattern = r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}'
-        match = re.search(date_pattern, text, re.IGNORECASE)
+        match = _DATE_RE.search(text)
         if match:
             return match.group(0).strip()
         return ""
@@ -0,0 +1,70 @@
+import os
+import sys
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+import diskcache
+
+# Add the project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.config import LLM_CACHE_DIR, LLM_CACHE_TTL, LLM_CACHE_DISABLED, EXTRACTION_PROMPT_VERSION
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def _cache() -> diskcache.Cache:
+    """Open the on-disk cache once per process"""
+    return diskcache.Cache(LLM_CACHE_DIR)
+
+def make_key(model: str, document_type: str, text: str, file_hash: Optional[str] = None) -> str:
+    """
+    Build the cache key for an AI extraction
+
+    Args:
+        model: Name of the AI model
+        document_type: Type of document (invoice or contract)
+        text: Document text sent to the model
+        file_hash: SHA-256 of the document file, required when its image is sent to the model
+            as well; a scanned document has next to no text, so the text alone doesn't identify it
+
+    Returns:
+        SHA-256 hex digest identifying the extraction
+    """
+    return hashlib.sha256(f"{model}|{EXTRACTION_PROMPT_VERSION}|{document_type}|{file_hash or ''}|{text}".encode("utf-8")).hexdigest()
+
+def make_file_key(model: str, document_type: str, file_hash: str) -> str:
+    """
+    Build the cache key for an AI extraction of a whole document file, which can be
+    looked up before the file's text is extracted
+
+    Args:
+        model: Name of the AI model
+        document_type: Type of document (invoice or contract)
+        file_hash: SHA-256 of the document file
+
+    Returns:
+        SHA-256 hex digest identifying the extraction
+    """
+    return hashlib.sha256(f"file|{model}|{EXTRACTION_PROMPT_VERSION}|{document_type}|{file_hash}".encode("utf-8")).hexdigest()
+
+def get(key: str) -> Optional[Any]:
+    """Return the cached value for a key, or None if it is missing, expired or the cache is disabled"""
+    if LLM_CACHE_DISABLED:
+        return None
+    try:
+        return _cache().get(key)
+    except Exception as e:
+        logger.warning(f"Error reading LLM cache: {str(e)}")
+        return None
+
+def set(key: str, value: Any, ttl: int = LLM_CACHE_TTL):
+    """Cache a value for ttl seconds; callers only cache results the model actually returned"""
+    if LLM_CACHE_DISABLED:
+        return
+    try:
+        _cache().set(key, value, expire=ttl)
+    except Exception as e:
+        logger.warning(f"Error writing LLM cache: {str(e)}")